@@ -1,83 +1,464 @@
+import csv
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
 import sqlite3
-import pandas as pd
-import matplotlib.pyplot as plt
-from typing import List, Optional, Tuple
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import date as Date
+from itertools import islice
+from typing import Any, ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+from importers import iter_source_rows, validate_rows
+from money import from_cents, to_cents
+from migrations import (category_token, explain_query_plan, fold_bulk_inserts, migrate, rebuild_balance_checkpoints,
+                        rebuild_category_usage, rebuild_month_versions, rebuild_rollups, rebuild_search_index,
+                        uses_index)
+from query_cache import DEFAULT_CACHE_SIZE, CacheInfo, QueryCache, cached_query
+from recurring import RecurringRule, describe_period, due_date, iter_occurrences, parse_date, parse_period
+
+IMPORT_BATCH_SIZE = 10000
+PAGE_SIZE = 1000
+SEARCH_LIMIT = 50
+# bm25 column weights of transactions_fts: a match in the description counts more than one in the category.
+SEARCH_WEIGHTS = (2.0, 1.0)
+# A limited search ranks only the most recent max(limit, SEARCH_CANDIDATES) matches: this bounds
+# the cost of very common words, at the price of missing older, better matches. limit=None ranks all.
+SEARCH_CANDIDATES = 1000
+TRANSACTION_COLUMNS = ("id", "date", "category", "description", "amount")
+# Amounts are stored as integer cents and categories as ids into the categories table; rows
+# handed to callers carry float amounts and category names.
+CATEGORY_NAME = "(SELECT name FROM categories WHERE categories.id = category_id)"
+TRANSACTION_SELECT = f"SELECT id, date, {CATEGORY_NAME} AS category, description, amount_cents / 100.0 AS amount FROM transactions"
+CATEGORY_ID = "(SELECT id FROM categories WHERE name = ?)"
+ENSURE_CATEGORY = "INSERT INTO categories (name) VALUES (?) ON CONFLICT (name) DO NOTHING"
+RULE_SELECT = f"""
+    SELECT id, {CATEGORY_NAME} AS category, description, amount_cents, frequency, interval, start_date, end_date,
+           next_occurrence, next_date
+    FROM recurring_rules"""
+
+
+TABLE_WIDTHS = (6, 10, 15, 30, 10)
+OUTPUT_FORMATS = ("table", "csv", "jsonl")
+CHART_FORMATS = ("png", "svg")
+SUMMARY_FIGSIZE = (18, 10)
+FORECAST_STYLES = {"linear": "orange", "seasonal": "purple", "recurring": "green"}
+
+
+def search_expression(text: str) -> str:
+    """Turn free text into an FTS5 query that matches rows containing every word as a prefix.
+
+    ``amazon prime`` becomes ``"amazon"* "prime"*``, so punctuation in the input never reaches
+    the FTS5 query parser.
+    """
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def write_transactions(rows: Iterable[Sequence[Any]], output: str = "table", title: Optional[str] = None,
+                       stream: Optional[TextIO] = None) -> int:
+    """Stream transaction rows to ``stream`` as a fixed-width table, CSV or JSON lines; return the row count."""
+    stream = stream or sys.stdout
+    count = 0
+    if output == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(TRANSACTION_COLUMNS)
+        for count, row in enumerate(rows, start=1):
+            writer.writerow(row)
+    elif output == "jsonl":
+        for count, row in enumerate(rows, start=1):
+            stream.write(json.dumps(dict(zip(TRANSACTION_COLUMNS, row))) + "\n")
+    elif output == "table":
+        if title:
+            stream.write(f"\n{title}\n")
+        stream.write("  ".join(col.rjust(width) for col, width in zip(TRANSACTION_COLUMNS, TABLE_WIDTHS)) + "\n")
+        for count, row in enumerate(rows, start=1):
+            cells = (f"{value:.2f}" if isinstance(value, float) else str(value) for value in row)
+            stream.write("  ".join(cell.rjust(width) for cell, width in zip(cells, TABLE_WIDTHS)) + "\n")
+    else:
+        raise ValueError(f"Unsupported output format: {output}")
+    return count
+
 
 class BudgetTracker:
-    def __init__(self, db_file: str = "budget_data.db"):
+    def __init__(self,
+                 db_file: str = "budget_data.db",
+                 initial_amount: Optional[float] = None,
+                 wal: bool = False,
+                 busy_timeout: float = 5.0,
+                 check_same_thread: bool = True,
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 profiler: Optional[Any] = None):
         self.db_file = db_file
-        self.conn = sqlite3.connect(self.db_file)
+        self.cache_dir = os.path.join(os.path.dirname(os.path.abspath(db_file)), ".budget_cache")
+        factory = profiler.connection_factory if profiler else sqlite3.Connection
+        self.conn = sqlite3.connect(self.db_file, timeout=busy_timeout, check_same_thread=check_same_thread,
+                                    factory=factory)
+        self.profiler = profiler
+        if profiler:
+            profiler.attach(self)
+        self._batch_depth = 0
+        self.query_cache = QueryCache(self.conn, cache_size) if cache_size > 0 else None
+        if wal:
+            self.enable_wal()
         self.create_table()
-        self.initialize_data_file()
+        self.initialize_data_file(initial_amount)
 
     def create_table(self) -> None:
-        """Create the transactions table if it doesn't exist."""
-        with self.conn:
-            self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                category TEXT NOT NULL,
-                description TEXT NOT NULL,
-                amount REAL NOT NULL
-            )
-            """)
+        """Create the transactions table if it doesn't exist and apply pending schema migrations."""
+        migrate(self.conn)
+
+    def enable_wal(self) -> None:
+        """Switch the database to write-ahead logging so readers never block the writer.
+
+        The journal mode is persistent, so every later connection to the file uses WAL too.
+        """
+        mode = self.conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        if mode.lower() != "wal":
+            raise RuntimeError(f"Could not enable WAL mode on {self.db_file} (journal mode is {mode}).")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+
+    def cache_info(self) -> Optional[CacheInfo]:
+        """Return the hit/miss counters of the read cache, or None if it is disabled."""
+        return self.query_cache.info() if self.query_cache else None
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Run the writes made inside the block in a single transaction, committed once at the end.
+
+        Any exception rolls back every write of the batch. Batches nest; only the outermost commits.
+        """
+        if self._batch_depth:
+            self._batch_depth += 1
+            try:
+                yield
+            finally:
+                self._batch_depth -= 1
+            return
+        self._batch_depth = 1
+        try:
+            with self.conn:
+                if not self.conn.in_transaction:
+                    self.conn.execute("BEGIN")
+                yield
+        except BaseException:
+            self._forget_rolled_back_reads()
+            raise
+        finally:
+            self._batch_depth = 0
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        """Make the writes inside the block atomic on their own within the current batch.
+
+        On an exception only this block's writes are rolled back before the exception propagates.
+        """
+        name = f"sp_{self._batch_depth}"
+        with self.batch():
+            self.conn.execute(f"SAVEPOINT {name}")
+            try:
+                yield
+            except BaseException:
+                self.conn.execute(f"ROLLBACK TO {name}")
+                self._forget_rolled_back_reads()
+                self.conn.execute(f"RELEASE {name}")
+                raise
+            self.conn.execute(f"RELEASE {name}")
+
+    def _forget_rolled_back_reads(self) -> None:
+        # A rollback moves neither PRAGMA data_version nor total_changes, so reads cached since
+        # the rolled-back writes would otherwise survive it.
+        if self.query_cache:
+            self.query_cache.clear()
+
+    def _transaction(self) -> ContextManager:
+        """Return the context that commits a single write, or a no-op inside a batch."""
+        return nullcontext() if self._batch_depth else self.conn
 
     def initialize_data_file(self, initial_amount: Optional[float] = None) -> None:
         """Initialize the database with the initial amount if the table is empty."""
         with self.conn:
             cursor = self.conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM transactions")
-            count = cursor.fetchone()[0]
-            if count == 0:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM transactions)")
+            if not cursor.fetchone()[0]:
                 if initial_amount is None:
                     initial_amount = float(input("Enter the initial amount of money in the account: "))
                 if initial_amount < 0:
                     raise ValueError("Initial amount must be a positive number.")
-                today = pd.Timestamp("today").strftime('%Y-%m-%d')
-                initial_transaction = (today, "Initial", "Initial Amount", initial_amount)
-                cursor.execute("""
-                    INSERT INTO transactions (date, category, description, amount)
-                    VALUES (?, ?, ?, ?)
+                today = Date.today().strftime('%Y-%m-%d')
+                initial_transaction = (today, "Initial", "Initial Amount", to_cents(initial_amount))
+                cursor.execute(ENSURE_CATEGORY, ("Initial",))
+                cursor.execute(f"""
+                    INSERT INTO transactions (date, category_id, description, amount_cents)
+                    VALUES (?, {CATEGORY_ID}, ?, ?)
                 """, initial_transaction)
 
-    def add_transaction(self, date: str, category: str, description: str, amount: float) -> None:
-        """Add a new transaction to the database."""
-        new_transaction = (date, category, description, amount)
-        with self.conn:
-            self.conn.execute("""
-                INSERT INTO transactions (date, category, description, amount)
-                VALUES (?, ?, ?, ?)
+    def add_transaction(self, date: str, category: str, description: str, amount: float) -> int:
+        """Add a new transaction to the database and return its ID; ``date`` must be YYYY-MM-DD."""
+        parse_date(date)
+        new_transaction = (date, category, description, to_cents(amount))
+        with self._transaction():
+            self.conn.execute(ENSURE_CATEGORY, (category,))
+            cursor = self.conn.execute(f"""
+                INSERT INTO transactions (date, category_id, description, amount_cents)
+                VALUES (?, {CATEGORY_ID}, ?, ?)
             """, new_transaction)
+        return cursor.lastrowid
+
+    def import_transactions(self,
+                            source: Any,
+                            format: Optional[str] = None,
+                            skip_duplicates: bool = True,
+                            batch_size: int = IMPORT_BATCH_SIZE,
+                            default_category: str = "Uncategorized") -> int:
+        """Bulk import transactions from a CSV/OFX file or an iterable of rows in one transaction.
+
+        Rows are streamed and inserted in chunks of ``batch_size``. When ``skip_duplicates`` is set,
+        rows matching an existing transaction on (date, amount, description) are skipped using
+        the dedup index; rows repeated inside the imported source itself are all kept. The per-row
+        insert triggers are switched off for the import (``ledger_state.bulk``) and the new rows
+        are folded into the rollups, search index and checkpoints in one pass at the end.
+        """
+        rows = validate_rows(iter_source_rows(source, format, default_category))
+        started = time.perf_counter()
+        seen = inserted = 0
+        # A savepoint, so that a failed import inside a batch cannot leave the bulk flag set.
+        with self.savepoint():
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM transactions")
+            last_existing_id = cursor.fetchone()[0]
+            cursor.execute("UPDATE ledger_state SET bulk = 1")
+            if skip_duplicates:
+                insert_query = """
+                    INSERT INTO transactions (date, category_id, description, amount_cents)
+                    SELECT ?1, (SELECT id FROM categories WHERE name = ?2), ?3, ?4
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM transactions
+                        WHERE date = ?1 AND amount_cents = ?4 AND description = ?3 AND id <= ?5
+                    )
+                """
+                rows = (row + (last_existing_id,) for row in rows)
+            else:
+                insert_query = f"""
+                    INSERT INTO transactions (date, category_id, description, amount_cents)
+                    VALUES (?, {CATEGORY_ID}, ?, ?)
+                """
+            while True:
+                chunk = list(islice(rows, batch_size))
+                if not chunk:
+                    break
+                cursor.executemany(ENSURE_CATEGORY, [(category,) for category in {row[1] for row in chunk}])
+                cursor.executemany(insert_query, chunk)
+                seen += len(chunk)
+                inserted += cursor.rowcount
+            cursor.execute("UPDATE ledger_state SET bulk = 0")
+            if inserted:
+                fold_bulk_inserts(self.conn, last_existing_id)
+        elapsed = time.perf_counter() - started
+        rate = seen / elapsed if elapsed > 0 else float(seen)
+        print(f"Imported {inserted} of {seen} transactions "
+              f"({seen - inserted} duplicates skipped) in {elapsed:.2f}s ({rate:,.0f} rows/s).")
+        return inserted
+
+    def add_recurring_rule(self, start_date: str, category: str, description: str, amount: float, period: str,
+                           end_date: Optional[str] = None) -> int:
+        """Add a rule repeating a transaction every ``period`` from ``start_date`` and return its ID.
+
+        ``period`` is a name such as ``monthly`` or an RRULE-style ``FREQ=WEEKLY;INTERVAL=2``; dates
+        must be YYYY-MM-DD and the end date, if any, not before the start. Nothing is added to the
+        ledger until ``materialize_recurring`` runs.
+        """
+        frequency, interval = parse_period(period)
+        start = parse_date(start_date, "start date")
+        if end_date is not None and parse_date(end_date, "end date") < start:
+            raise ValueError(f"End date {end_date} is before start date {start_date}")
+        with self._transaction():
+            self.conn.execute(ENSURE_CATEGORY, (category,))
+            cursor = self.conn.execute(f"""
+                INSERT INTO recurring_rules (category_id, description, amount_cents, frequency, interval,
+                                             start_date, end_date, next_date)
+                VALUES ({CATEGORY_ID}, ?, ?, ?, ?, ?, ?, ?)
+            """, (category, description, to_cents(amount), frequency, interval, start_date, end_date, start_date))
+        return cursor.lastrowid
+
+    def delete_recurring_rule(self, rule_id: int) -> bool:
+        """Delete a recurring rule and return whether it existed; transactions it created are kept."""
+        with self._transaction():
+            cursor = self.conn.execute("DELETE FROM recurring_rules WHERE id = ?", (rule_id,))
+        return cursor.rowcount > 0
+
+    @cached_query
+    def get_recurring_rules(self) -> List[RecurringRule]:
+        """Return every recurring rule in ID order."""
+        return [RecurringRule(*row) for row in self.conn.execute(RULE_SELECT + " ORDER BY id")]
+
+    def print_recurring_rules(self) -> None:
+        """Print every recurring rule with its schedule and next occurrence."""
+        print("\nRecurring Rules:")
+        for rule in self.get_recurring_rules():
+            print(f"[{rule.id}] {rule.description} ({rule.category}): {from_cents(rule.amount_cents):.2f} "
+                  f"{describe_period(rule.frequency, rule.interval)} from {rule.start_date}"
+                  f"{f' until {rule.end_date}' if rule.end_date else ''}, "
+                  f"{f'next on {rule.next_date}' if rule.next_date else 'ended'}")
+
+    def materialize_recurring(self, until: Optional[str] = None) -> int:
+        """Add every occurrence of the recurring rules due up to ``until`` (default: today); return how many were added.
+
+        Only rules with an occurrence due are read. Their occurrences are inserted with one bulk
+        INSERT OR IGNORE, which the unique (rule_id, occurrence) index makes idempotent, and each
+        rule records how far it got, so running this again (e.g. from cron) only adds what became
+        due since. Deleted occurrences are not recreated.
+        """
+        until = until or Date.today().strftime('%Y-%m-%d')
+        started = time.perf_counter()
+        with self._transaction():
+            rules = [RecurringRule(*row) for row in self.conn.execute(RULE_SELECT + " WHERE next_date <= ?", (until,))]
+            occurrences = []
+            progress = []
+            for rule in rules:
+                due = [(day, occurrence, rule.id) for occurrence, day in iter_occurrences(rule, until, rule.next_occurrence)]
+                occurrences += due
+                next_occurrence = rule.next_occurrence + len(due)
+                progress.append((next_occurrence, due_date(rule, next_occurrence), rule.id))
+            cursor = self.conn.executemany("""
+                INSERT OR IGNORE INTO transactions (date, category_id, description, amount_cents, rule_id, occurrence)
+                SELECT ?, category_id, description, amount_cents, id, ? FROM recurring_rules WHERE id = ?
+            """, occurrences)
+            inserted = max(cursor.rowcount, 0)
+            self.conn.executemany("UPDATE recurring_rules SET next_occurrence = ?, next_date = ? WHERE id = ?", progress)
+        print(f"Materialized {inserted} occurrences of {len(rules)} recurring rules up to {until} "
+              f"in {time.perf_counter() - started:.2f}s.")
+        return inserted
 
     def view_summary(self, 
                      start_date: Optional[str] = None, 
                      end_date: Optional[str] = None, 
                      future_days: Optional[int] = None) -> None:
         """Visualize a summary of expenses by category with optional filters."""
-        summary_query = """
-            SELECT category, SUM(amount) as total
-            FROM transactions
-            WHERE 1=1
-        """
-        params = []
-
-        if start_date:
-            summary_query += " AND date >= ?"
-            params.append(start_date)
-        if end_date:
-            summary_query += " AND date <= ?"
-            params.append(end_date)
+        import matplotlib.pyplot as plt
 
-        summary_query += " GROUP BY category;"
-        df_summary = pd.read_sql_query(summary_query, self.conn, params=params)
+        df_summary, df_balance = self._summary_data(start_date, end_date)
 
         print("\nExpense Summary by Category:")
         for _, row in df_summary.iterrows():
             print(f"{row['category']}: {row['total']:.2f}")
 
-        # Visualization
-        fig, axs = plt.subplots(2, 2, figsize=(18, 10))
+        fig = plt.figure(figsize=SUMMARY_FIGSIZE)
+        self._plot_summary(fig, df_summary, df_balance, self._summary_forecasts(start_date, end_date, future_days))
+        plt.show()
+
+    def render_summary(self,
+                       output_path: str,
+                       fmt: Optional[str] = None,
+                       start_date: Optional[str] = None,
+                       end_date: Optional[str] = None,
+                       future_days: Optional[int] = None) -> bool:
+        """Render the summary charts to a PNG or SVG file without a display.
+
+        Renders are cached under ``cache_dir`` keyed on the filters, ``future_days`` and the ledger
+        data version, so refreshing an unchanged ledger only copies a file. Returns True on a cache hit.
+        """
+        fmt = (fmt or os.path.splitext(output_path)[1].lstrip(".")).lower()
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f"Unsupported chart format: {fmt!r} (expected one of {', '.join(CHART_FORMATS)})")
+        key = json.dumps([os.path.abspath(self.db_file), start_date, end_date, future_days])
+        prefix = hashlib.sha1(key.encode()).hexdigest()[:16]
+        cached = os.path.join(self.cache_dir, f"{prefix}-{self.data_version()}.{fmt}")
+        hit = os.path.exists(cached)
+        if not hit:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for stale in glob.glob(os.path.join(self.cache_dir, f"{prefix}-*.{fmt}")):
+                os.remove(stale)
+            df_summary, df_balance = self._summary_data(start_date, end_date)
+            fig = Figure(figsize=SUMMARY_FIGSIZE)
+            FigureCanvasAgg(fig)
+            self._plot_summary(fig, df_summary, df_balance, self._summary_forecasts(start_date, end_date, future_days))
+            fig.savefig(cached + ".tmp", format=fmt)
+            os.replace(cached + ".tmp", cached)
+        shutil.copyfile(cached, output_path)
+        return hit
+
+    def data_version(self) -> int:
+        """Return the ledger data version, bumped by every write to transactions, recurring rules or category names."""
+        return self.conn.execute("SELECT version FROM ledger_state").fetchone()[0]
+
+    def _summary_data(self, start_date: Optional[str], end_date: Optional[str]) -> Tuple[Any, Any]:
+        """Load the category totals and the daily balance series as pandas DataFrames."""
+        import pandas as pd
+
+        df_summary = pd.DataFrame(self.get_category_totals(start_date, end_date), columns=['category', 'total'])
+
+        df_balance = pd.DataFrame(self.get_balance_series(start_date, end_date), columns=['date', 'balance'])
+        df_balance['date'] = pd.to_datetime(df_balance['date'])
+
+        # Remove duplicate dates
+        df_balance = df_balance.drop_duplicates(subset='date')
+        if df_balance.empty:
+            # No transactions in the range: the balance plot is drawn with empty axes.
+            return df_summary, df_balance
+
+        # Ensure dates are spaced by 1 day
+        all_dates = pd.date_range(start=df_balance['date'].min(), end=df_balance['date'].max())
+        df_balance = df_balance.set_index('date').reindex(all_dates, method='ffill').reset_index()
+        df_balance.columns = ['date', 'balance']
+        return df_summary, df_balance
+
+    def _summary_forecasts(self, start_date: Optional[str], end_date: Optional[str],
+                           future_days: Optional[int]) -> Optional[Dict[str, Any]]:
+        if not future_days:
+            return None
+        return self.forecast(future_days, start_date, end_date)[0]
+
+    def forecast(self,
+                 future_days: int,
+                 start_date: Optional[str] = None,
+                 end_date: Optional[str] = None,
+                 models: Optional[Sequence[str]] = None,
+                 confidence: float = 0.9) -> Tuple[Dict[str, Any], List[Any]]:
+        """Forecast the balance ``future_days`` past the last transaction of the optional date range.
+
+        The recurring model projects the recurring rules on their schedule. Returns the forecasts
+        by model name (see ``forecasting.MODELS``), with balances in cents, and the recurring
+        transactions that were detected outside the rules.
+        """
+        from forecasting import MODELS, forecast
+
+        opening_cents = self._balance_cents(start_date, inclusive=False) if start_date else 0
+        return forecast(self.ledger(start_date, end_date), future_days, opening_cents, models=models or MODELS,
+                        confidence=confidence, rules=self.get_recurring_rules())
+
+    def print_forecast(self, future_days: int, start_date: Optional[str] = None, end_date: Optional[str] = None) -> None:
+        """Print the recurring rules and detected recurring transactions and the forecast balance of every model."""
+        from forecasting import PERIOD_NAMES
+        from ledger import from_day
+
+        forecasts, recurring = self.forecast(future_days, start_date, end_date)
+        print("\nRecurring Transactions:")
+        for rule in self.get_recurring_rules():
+            print(f"{rule.description} ({rule.category}): {from_cents(rule.amount_cents):.2f} "
+                  f"{describe_period(rule.frequency, rule.interval)}, rule {rule.id}")
+        for series in recurring:
+            print(f"{series.description} ({series.category}): {from_cents(series.amount_cents):.2f} "
+                  f"{PERIOD_NAMES[series.period_days]}, last on {from_day(series.last_day)}")
+        if not forecasts:
+            print("\nNot enough history to forecast.")
+            return
+        print(f"\nForecast Balance in {future_days} Days (90% band):")
+        for name, forecast in forecasts.items():
+            print(f"{name:<10} {from_day(forecast.days[-1])}: {forecast.mean[-1] / 100:.2f} "
+                  f"[{forecast.lower[-1] / 100:.2f}, {forecast.upper[-1] / 100:.2f}]")
+
+    def _plot_summary(self, fig: Any, df_summary: Any, df_balance: Any, forecasts: Optional[Dict[str, Any]]) -> None:
+        """Draw the 2x2 summary dashboard onto a matplotlib figure."""
+        import matplotlib.dates as mdates
+        import numpy as np
+
+        axs = fig.subplots(2, 2)
 
         # Bar plot
         colors = ['green' if total >= 0 else 'red' for total in df_summary['total']]
@@ -89,69 +470,40 @@ class BudgetTracker:
 
         # Pie chart
         expenses = df_summary[df_summary['total'] < 0]
-        axs[0, 1].pie(abs(expenses['total']), labels=expenses['category'], autopct='%1.1f%%', startangle=140, wedgeprops=dict(width=0.3))
+        if not expenses.empty:
+            axs[0, 1].pie(abs(expenses['total']), labels=expenses['category'], autopct='%1.1f%%', startangle=140, wedgeprops=dict(width=0.3))
         axs[0, 1].axis('equal')
         axs[0, 1].set_title("Expense Distribution by Category")
 
         # Time graph of account balance
-        balance_query = """
-            SELECT date, SUM(amount) OVER (ORDER BY date) as balance
-            FROM transactions
-            WHERE 1=1
-        """
-        if start_date:
-            balance_query += " AND date >= ?"
-        if end_date:
-            balance_query += " AND date <= ?"
-
-        df_balance = pd.read_sql_query(balance_query, self.conn, params=params)
-        df_balance['date'] = pd.to_datetime(df_balance['date'])
-
-        # Remove duplicate dates
-        df_balance = df_balance.drop_duplicates(subset='date')
-
-        # Ensure dates are spaced by 1 day
-        all_dates = pd.date_range(start=df_balance['date'].min(), end=df_balance['date'].max())
-        df_balance = df_balance.set_index('date').reindex(all_dates, method='ffill').reset_index()
-        df_balance.columns = ['date', 'balance']
-
         axs[1, 0].plot(df_balance['date'], df_balance['balance'], marker='o')
         axs[1, 0].set_xlabel("Date")
         axs[1, 0].set_ylabel("Balance")
         axs[1, 0].set_title("Account Balance Over Time")
         axs[1, 0].tick_params(axis='x', rotation=45)
 
-        # Naive prediction of future balance
-        if not df_balance.empty and future_days is not None:
+        # Forecast of future balance, connected to the last plotted point
+        if not df_balance.empty and forecasts:
+            last_date = df_balance['date'].iloc[-1].to_datetime64()
             last_balance = df_balance['balance'].iloc[-1]
-            daily_max_change = df_balance['balance'].diff().max()
-            # daily_min_change = df_balance['balance'].diff().min()
-            daily_mean_change = df_balance['balance'].diff().mean()
-            future_dates = pd.date_range(df_balance['date'].iloc[-1] + pd.Timedelta(days=1), periods=future_days)
-            future_max_balances = [last_balance + daily_max_change * i for i in range(1, future_days + 1)]
-            # future_min_balances = [last_balance + daily_min_change * i for i in range(1, future_days + 1)]
-            future_mean_balances = [last_balance + daily_mean_change * i for i in range(1, future_days + 1)]
-
-            # Connect the last point with the future lines
-            future_dates = pd.to_datetime([df_balance['date'].iloc[-1]] + list(future_dates))
-            future_max_balances = [last_balance] + future_max_balances
-            # future_min_balances = [last_balance] + future_min_balances
-            future_mean_balances = [last_balance] + future_mean_balances
-
-            axs[1, 0].plot(future_dates, future_max_balances, linestyle='--', color='orange', label='Max Predicted Balance')
-            # axs[1, 0].plot(future_dates, future_min_balances, linestyle='--', color='blue', label='Min Predicted Balance')
-            axs[1, 0].plot(future_dates, future_mean_balances, linestyle='--', color='green', label='Mean Predicted Balance')
+            for name, forecast in forecasts.items():
+                style = FORECAST_STYLES[name]
+                future_dates = np.concatenate([[last_date], np.datetime64('1970-01-01', 'D') + forecast.days])
+                mean = np.concatenate([[last_balance], forecast.mean / 100])
+                axs[1, 0].plot(future_dates, mean, linestyle='--', color=style, label=f'{name.capitalize()} Forecast')
+                axs[1, 0].fill_between(future_dates[1:], forecast.lower / 100, forecast.upper / 100, color=style, alpha=0.12)
             axs[1, 0].legend()
 
         # line at 0
         axs[1, 0].axhline(y=0, color='black', linestyle='--')
 
-        axs[1, 0].xaxis.set_major_formatter(plt.matplotlib.dates.DateFormatter('%d-%m-%Y'))
-        n_days = len(df_balance['date'].dt.date.unique()) + future_days if future_days is not None else len(df_balance['date'].dt.date.unique())
+        axs[1, 0].xaxis.set_major_formatter(mdates.DateFormatter('%d-%m-%Y'))
+        future_days = max((len(forecast.days) for forecast in forecasts.values()), default=0) if forecasts else 0
+        n_days = len(df_balance['date'].dt.date.unique()) + future_days
         if n_days < 10:
-            axs[1, 0].xaxis.set_major_locator(plt.matplotlib.dates.DayLocator(interval=1))
+            axs[1, 0].xaxis.set_major_locator(mdates.DayLocator(interval=1))
         else:
-            axs[1, 0].xaxis.set_major_locator(plt.matplotlib.dates.DayLocator(interval=5))
+            axs[1, 0].xaxis.set_major_locator(mdates.DayLocator(interval=5))
 
         # Total Income vs Total Expenses
         total_income = df_summary[df_summary['total'] > 0]['total'].sum()
@@ -163,102 +515,395 @@ class BudgetTracker:
         axs[1, 1].set_ylabel("Total Amount")
         axs[1, 1].set_title("Total Income vs Total Expenses")
 
-        plt.tight_layout()
-        plt.show()
+        fig.tight_layout()
 
     def calculate_balance(self) -> None:
         """Calculate the current balance (total income - total expenses)."""
-        df = pd.read_sql_query("SELECT SUM(amount) as balance FROM transactions", self.conn)
-        balance = df['balance'].iloc[0]
-        print(f"\nCurrent Balance: {balance:.2f}")
-
-    def print_transactions(self) -> None:
-        """Print all transactions in the database."""
-        df = pd.read_sql_query("SELECT * FROM transactions", self.conn, index_col='id')
-        print("\nAll Transactions:")
-        print(df)
-
-    def delete_transaction(self, transaction_id: int) -> None:
-        """Delete a transaction by its ID."""
-        with self.conn:
-            self.conn.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
-        print(f"Transaction with ID {transaction_id} deleted successfully.")
+        print(f"\nCurrent Balance: {self.get_balance():.2f}")
+
+    @cached_query
+    def get_balance(self) -> float:
+        """Return the current balance (total income - total expenses)."""
+        cursor = self.conn.execute("SELECT opening_cents + net_cents FROM balance_checkpoints ORDER BY month DESC LIMIT 1")
+        row = cursor.fetchone()
+        return from_cents(row[0] if row else 0)
+
+    @cached_query
+    def balance_at(self, date: str) -> float:
+        """Return the balance at the end of ``date``, including every transaction up to that day."""
+        return from_cents(self._balance_cents(date, inclusive=True))
+
+    def _balance_cents(self, date: str, inclusive: bool) -> int:
+        """Return the balance in cents at the end of ``date`` or, if not inclusive, at its start.
+
+        Served by the balance_checkpoints of the month plus at most a month of daily_totals.
+        """
+        query, params = self._balance_at_query(date, inclusive)
+        return self.conn.execute(query, params).fetchone()[0]
+
+    @cached_query
+    def get_category_totals(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Return (category, total) pairs for the optional date range."""
+        query, params = self._summary_query(start_date, end_date)
+        return self.conn.execute(query, params).fetchall()
+
+    @cached_query
+    def get_balance_series(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Return (day, closing balance) pairs for every day with transactions in the optional date range.
+
+        With a start date the series starts from the true opening balance, not from 0.
+        """
+        opening_cents = self._balance_cents(start_date, inclusive=False) if start_date else 0
+        query, params = self._balance_query(start_date, end_date, opening_cents)
+        return self.conn.execute(query, params).fetchall()
+
+    def ledger(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Any:
+        """Load an array-backed LedgerArrays view of the transactions for vectorized NumPy analysis."""
+        from ledger import LedgerArrays
+
+        return LedgerArrays.from_connection(self.conn, start_date, end_date)
 
-    def modify_transaction(self, transaction_id: int, date: Optional[str] = None, category: Optional[str] = None, description: Optional[str] = None, amount: Optional[float] = None) -> None:
-        """Modify an existing transaction."""
+    def export_snapshot(self, path: str, format: str = "npy", full: bool = False) -> int:
+        """Write or refresh a month-partitioned columnar snapshot (see ``snapshot.py``) and return the partitions written.
+
+        Only months changed since the last export are rewritten unless ``full`` is set. The months
+        are read in one transaction, so the snapshot is consistent with a single ledger state.
+        """
+        from snapshot import export_snapshot
+
+        start_time = time.perf_counter()
+        with self.batch():
+            written, removed, unchanged = export_snapshot(self.conn, path, format, full)
+        print(f"Snapshot {path} ({format}): {written} month partitions written, {removed} removed, "
+              f"{unchanged} unchanged in {time.perf_counter() - start_time:.2f}s.")
+        return written
+
+    def rebuild_aggregates(self) -> None:
+        """Recompute everything the triggers maintain from the transactions and categories tables.
+
+        That is the rollup tables, the balance checkpoints, the category usage counts and the
+        search indexes; every month version and the ledger data version are bumped, so snapshots
+        and rendered charts built from the old aggregates are refreshed.
+        """
+        with self._transaction():
+            rebuild_rollups(self.conn)
+            rebuild_balance_checkpoints(self.conn)
+            rebuild_category_usage(self.conn)
+            rebuild_search_index(self.conn)
+            rebuild_month_versions(self.conn)
+            self.conn.execute("UPDATE ledger_state SET version = version + 1")
+        print("Aggregates rebuilt successfully.")
+
+    def print_transactions(self,
+                           limit: Optional[int] = None,
+                           after_id: Optional[int] = None,
+                           output: str = "table") -> None:
+        """Print all transactions in the database, streaming them in ID order."""
+        rows = self.iter_transactions(after_id=after_id, limit=limit, order_by="id")
+        write_transactions(rows, output, title="All Transactions:")
+
+    def delete_transaction(self, transaction_id: int) -> bool:
+        """Delete a transaction by its ID and return whether it existed."""
+        with self._transaction():
+            cursor = self.conn.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
+        return cursor.rowcount > 0
+
+    def modify_transaction(self, transaction_id: int, date: Optional[str] = None, category: Optional[str] = None, description: Optional[str] = None, amount: Optional[float] = None) -> bool:
+        """Modify an existing transaction and return whether it existed."""
         update_query = "UPDATE transactions SET "
         updates = []
         params = []
 
         if date:
+            parse_date(date)
             updates.append("date = ?")
             params.append(date)
         if category:
-            updates.append("category = ?")
+            updates.append(f"category_id = {CATEGORY_ID}")
             params.append(category)
         if description:
             updates.append("description = ?")
             params.append(description)
         if amount:
-            updates.append("amount = ?")
-            params.append(amount)
+            updates.append("amount_cents = ?")
+            params.append(to_cents(amount))
+
+        if not updates:
+            return self.conn.execute("SELECT 1 FROM transactions WHERE id = ?", (transaction_id,)).fetchone() is not None
 
         update_query += ", ".join(updates) + " WHERE id = ?;"
         params.append(transaction_id)
 
-        with self.conn:
-            self.conn.execute(update_query, params)
-        print(f"Transaction with ID {transaction_id} updated successfully.")
+        with self._transaction():
+            if category:
+                self.conn.execute(ENSURE_CATEGORY, (category,))
+            cursor = self.conn.execute(update_query, params)
+        return cursor.rowcount > 0
 
+    @cached_query
     def get_categories(self) -> List[str]:
-        """Retrieve a list of unique categories from the database."""
-        with self.conn:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT DISTINCT category FROM transactions;")
-            categories = [row[0] for row in cursor.fetchall()]
-        return categories
-
-    def filter_transactions(self, category: Optional[str] = None, start_date: Optional[str] = None, end_date: Optional[str] = None) -> None:
-        """Filter transactions by category and/or date range."""
-        query = "SELECT * FROM transactions WHERE 1=1"
-        params = []
+        """Retrieve the categories in use, in alphabetical order."""
+        cursor = self.conn.execute(self._categories_query())
+        return [row[0] for row in cursor.fetchall()]
+
+    @cached_query
+    def get_category_usage(self) -> List[Tuple[str, int]]:
+        """Return (category, number of transactions) pairs of the categories in use, most used first."""
+        return self.conn.execute(
+            "SELECT name, usage_count FROM categories WHERE usage_count > 0 ORDER BY usage_count DESC, name").fetchall()
+
+    def rename_category(self, old_name: str, new_name: str) -> int:
+        """Rename a category, merging it into ``new_name`` if that category already exists.
+
+        A rename updates the single categories row. A merge repoints the merged category's
+        transactions through the category index and deletes it. Returns the number of transactions
+        that now carry the new name.
+        """
+        with self._transaction():
+            row = self.conn.execute("SELECT id, usage_count FROM categories WHERE name = ?", (old_name,)).fetchone()
+            if row is None:
+                raise ValueError(f"Category '{old_name}' does not exist.")
+            category_id, usage_count = row
+            if old_name == new_name:
+                return usage_count
+            target = self.conn.execute("SELECT id FROM categories WHERE name = ?", (new_name,)).fetchone()
+            if target is None:
+                self.conn.execute("UPDATE categories SET name = ? WHERE id = ?", (new_name, category_id))
+                print(f"Category '{old_name}' renamed to '{new_name}' ({usage_count} transactions).")
+                return usage_count
+            cursor = self.conn.execute("UPDATE transactions SET category_id = ? WHERE category_id = ?",
+                                       (target[0], category_id))
+            self.conn.execute("UPDATE recurring_rules SET category_id = ? WHERE category_id = ?", (target[0], category_id))
+            self.conn.execute("DELETE FROM categories WHERE id = ?", (category_id,))
+        print(f"Category '{old_name}' merged into '{new_name}' ({cursor.rowcount} transactions moved).")
+        return cursor.rowcount
+
+    def filter_transactions(self,
+                            category: Optional[str] = None,
+                            start_date: Optional[str] = None,
+                            end_date: Optional[str] = None,
+                            limit: Optional[int] = None,
+                            after_id: Optional[int] = None,
+                            output: str = "table") -> None:
+        """Filter transactions by category and/or date range, streaming them in date order."""
+        rows = self.iter_transactions(category, start_date, end_date, after_id=after_id, limit=limit)
+        write_transactions(rows, output, title="Filtered Transactions:")
+
+    def iter_transactions(self,
+                          category: Optional[str] = None,
+                          start_date: Optional[str] = None,
+                          end_date: Optional[str] = None,
+                          after_id: Optional[int] = None,
+                          limit: Optional[int] = None,
+                          page_size: int = PAGE_SIZE,
+                          order_by: str = "date") -> Iterator[Tuple]:
+        """Yield matching transactions page by page in constant memory.
+
+        Pages are fetched with keyset pagination on ``(date, id)`` or ``id`` instead of OFFSET, so
+        every page is an index seek. ``after_id`` resumes right after that transaction in the chosen order.
+        """
+        if order_by not in ("date", "id"):
+            raise ValueError(f"Unsupported order: {order_by}")
+        base_query, base_params = self._filter_query(category, start_date, end_date)
+        key: Optional[Tuple] = None
+        if after_id is not None:
+            if order_by == "id":
+                key = (after_id,)
+            else:
+                row = self.conn.execute("SELECT date FROM transactions WHERE id = ?", (after_id,)).fetchone()
+                if row is None:
+                    raise ValueError(f"Transaction with ID {after_id} does not exist.")
+                key = (row[0], after_id)
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            query, params = base_query, list(base_params)
+            if key is not None:
+                query += " AND id > ?" if order_by == "id" else " AND (date, id) > (?, ?)"
+                params += key
+            query += " ORDER BY id" if order_by == "id" else " ORDER BY date, id"
+            page = self.conn.execute(query + " LIMIT ?", params + [size]).fetchall()
+            yield from page
+            if len(page) < size:
+                break
+            last = page[-1]
+            key = (last[0],) if order_by == "id" else (last[1], last[0])
+            if remaining is not None:
+                remaining -= len(page)
+
+    @cached_query
+    def search_transactions(self,
+                            query: str,
+                            category: Optional[str] = None,
+                            start_date: Optional[str] = None,
+                            end_date: Optional[str] = None,
+                            limit: Optional[int] = SEARCH_LIMIT) -> List[Tuple]:
+        """Return the transactions whose description or category match ``query``, best match first.
+
+        Every word of ``query`` must match the start of a word in the description or category
+        (case and accent insensitive). Results can be narrowed to a category and/or date range and
+        are ranked with bm25 on the FTS5 index, newest first on ties. For speed, a limited search
+        ranks only the ``max(limit, SEARCH_CANDIDATES)`` most recent matches, so an older match can
+        lose its place to newer ones; ``limit=None`` ranks and returns every match.
+        """
+        expression = self._search_expression(query)
+        if not expression:
+            return []
+        candidates = None if limit is None else max(limit, SEARCH_CANDIDATES)
+        sql, params = self._search_query(expression, category, start_date, end_date, candidates)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.conn.execute(sql, params).fetchall()
+
+    def print_search_results(self,
+                             query: str,
+                             category: Optional[str] = None,
+                             start_date: Optional[str] = None,
+                             end_date: Optional[str] = None,
+                             limit: Optional[int] = SEARCH_LIMIT,
+                             output: str = "table") -> None:
+        """Print the transactions matching a full-text search, best match first."""
+        rows = self.search_transactions(query, category, start_date, end_date, limit)
+        write_transactions(rows, output, title=f"Transactions Matching '{query}':")
+
+    def get_all_transactions(self) -> List[List[Any]]:
+        """Retrieve all transactions from the database in ID order."""
+        return [list(row) for row in self.iter_transactions(order_by="id")]
+
+    @cached_query
+    def get_filtered_transactions(self, category: Optional[str] = None, date: Optional[str] = None) -> List[Tuple]:
+        """Retrieve transactions filtered by category and/or date."""
+        query, params = self._filter_query(category, date, date)
+        return self.conn.execute(query, params).fetchall()
 
-        if category:
-            query += " AND category = ?"
-            params.append(category)
+    @staticmethod
+    def _date_range_clause(start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, List[Any]]:
+        clause = ""
+        params: List[Any] = []
         if start_date:
-            query += " AND date >= ?"
+            clause += " AND date >= ?"
             params.append(start_date)
         if end_date:
-            query += " AND date <= ?"
+            clause += " AND date <= ?"
             params.append(end_date)
+        return clause, params
+
+    def _summary_query(self, start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, List[Any]]:
+        if not start_date and not end_date:
+            return (f"SELECT {CATEGORY_NAME} AS category, SUM(total_cents) / 100.0 as total FROM monthly_totals "
+                    "GROUP BY category_id ORDER BY category;", [])
+        clause, params = self._date_range_clause(start_date, end_date)
+        query = f"SELECT {CATEGORY_NAME} AS category, SUM(total_cents) / 100.0 as total FROM daily_totals WHERE 1=1"
+        return query + clause.replace("date", "day") + " GROUP BY category_id ORDER BY category;", params
+
+    def _balance_query(self, start_date: Optional[str], end_date: Optional[str],
+                       opening_cents: int = 0) -> Tuple[str, List[Any]]:
+        clause, params = self._date_range_clause(start_date, end_date)
+        query = "SELECT day as date, (? + SUM(SUM(total_cents)) OVER (ORDER BY day)) / 100.0 as balance FROM daily_totals WHERE 1=1"
+        return query + clause.replace("date", "day") + " GROUP BY day", [opening_cents] + params
+
+    def _balance_at_query(self, date: str, inclusive: bool) -> Tuple[str, List[Any]]:
+        # The latest checkpoint not after the month of `date` gives the opening balance of that
+        # month, or the closing balance of an earlier one; the days of the month up to `date` follow.
+        query = f"""
+            SELECT COALESCE((SELECT CASE WHEN month = substr(?, 1, 7) THEN opening_cents ELSE opening_cents + net_cents END
+                             FROM balance_checkpoints WHERE month <= substr(?, 1, 7) ORDER BY month DESC LIMIT 1), 0)
+                 + COALESCE((SELECT SUM(total_cents) FROM daily_totals
+                             WHERE day >= substr(?, 1, 7) || '-01' AND day {'<=' if inclusive else '<'} ?), 0)
+        """
+        return query, [date] * 4
 
-        df = pd.read_sql_query(query, self.conn, params=params)
-        print("\nFiltered Transactions:")
-        print(df)
-
-    def get_all_transactions(self) -> List[Tuple]:
-        """Retrieve all transactions from the database."""
-        df = pd.read_sql_query("SELECT * FROM transactions", self.conn)
-        return df.values.tolist()
-
-    def get_filtered_transactions(self, category: Optional[str] = None, date: Optional[str] = None) -> List[Tuple]:
-        """Retrieve transactions filtered by category and/or date."""
-        query = "SELECT * FROM transactions WHERE 1=1"
-        params = []
-
+    def _filter_query(self, category: Optional[str], start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, List[Any]]:
+        query = TRANSACTION_SELECT + " WHERE 1=1"
+        params: List[Any] = []
         if category:
-            query += " AND category = ?"
+            query += f" AND category_id = {CATEGORY_ID}"
             params.append(category)
-        if date:
+        if start_date and start_date == end_date:
             query += " AND date = ?"
-            params.append(date)
+            params.append(start_date)
+        else:
+            clause, range_params = self._date_range_clause(start_date, end_date)
+            query += clause
+            params += range_params
+        return query, params
 
-        with self.conn:
-            cursor = self.conn.cursor()
-            cursor.execute(query, params)
-            transactions = cursor.fetchall()
-        return transactions
+    def _search_expression(self, text: str) -> str:
+        """Build the FTS5 query for ``text``: every word must prefix a word of the description or category.
+
+        Category names are matched in the small categories_fts index; the categories found are
+        then matched by their token in the category column of transactions_fts.
+        """
+        terms = []
+        for word in re.findall(r"\w+", text):
+            phrase = search_expression(word)
+            category_ids = [row[0] for row in
+                            self.conn.execute("SELECT rowid FROM categories_fts WHERE categories_fts MATCH ?", (phrase,))]
+            if category_ids:
+                tokens = " OR ".join(f'"{category_token(category_id)}"' for category_id in category_ids)
+                terms.append(f"(description : {phrase} OR category : ({tokens}))")
+            else:
+                terms.append(f"description : {phrase}")
+        return " AND ".join(terms)
+
+    def _search_query(self, expression: str, category: Optional[str], start_date: Optional[str],
+                      end_date: Optional[str], candidates: Optional[int] = SEARCH_CANDIDATES) -> Tuple[str, List[Any]]:
+        weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+        matches = f"""
+            SELECT transactions.id AS id, bm25(transactions_fts, {weights}) AS score
+            FROM transactions_fts JOIN transactions ON transactions.id = transactions_fts.rowid
+            WHERE transactions_fts MATCH ?"""
+        params: List[Any] = [expression]
+        if category:
+            matches += f" AND transactions.category_id = {CATEGORY_ID}"
+            params.append(category)
+        clause, range_params = self._date_range_clause(start_date, end_date)
+        matches += clause
+        params += range_params
+        if candidates is not None:
+            matches += " ORDER BY transactions_fts.rowid DESC LIMIT ?"
+            params.append(candidates)
+        query = TRANSACTION_SELECT + f" JOIN ({matches}) AS matches USING (id) ORDER BY score, id DESC"
+        return query, params
+
+    def _categories_query(self) -> str:
+        return "SELECT name FROM categories WHERE usage_count > 0 ORDER BY name;"
+
+    def query_plans(self) -> List[Tuple[str, List[str]]]:
+        """Return the EXPLAIN QUERY PLAN output of every query method with representative filters."""
+        start, end, category = "2000-01-01", "2000-12-31", "Initial"
+        queries = [
+            ("view_summary (categories)", self._summary_query(None, None)),
+            ("view_summary (categories, date range)", self._summary_query(start, end)),
+            ("view_summary (balance)", self._balance_query(None, None)),
+            ("view_summary (balance, date range)", self._balance_query(start, end)),
+            ("balance_at", self._balance_at_query(end, True)),
+            ("filter_transactions (category)", self._filter_query(category, None, None)),
+            ("filter_transactions (date range)", self._filter_query(None, start, end)),
+            ("filter_transactions (category, date range)", self._filter_query(category, start, end)),
+            ("get_filtered_transactions (category, date)", self._filter_query(category, start, start)),
+            ("get_categories", (self._categories_query(), [])),
+            ("search_transactions (category, date range)",
+             self._search_query(self._search_expression("market"), category, start, end)),
+            ("iter_transactions (category, date page)",
+             (self._filter_query(category, None, None)[0] + " AND (date, id) > (?, ?) ORDER BY date, id LIMIT ?",
+              [category, start, 0, PAGE_SIZE])),
+            ("iter_transactions (date range, date page)",
+             (self._filter_query(None, start, end)[0] + " AND (date, id) > (?, ?) ORDER BY date, id LIMIT ?",
+              [start, end, start, 0, PAGE_SIZE])),
+        ]
+        return [(name, explain_query_plan(self.conn, query, params)) for name, (query, params) in queries]
+
+    def check_query_plans(self) -> bool:
+        """Print the query plan of every query method and return True if all of them use an index."""
+        all_indexed = True
+        print("\nQuery Plans:")
+        for name, plan in self.query_plans():
+            indexed = uses_index(plan)
+            all_indexed = all_indexed and indexed
+            print(f"[{'OK' if indexed else 'SCAN'}] {name}: {'; '.join(plan)}")
+        return all_indexed
 
     def __del__(self):
         """Close the database connection when the object is deleted."""
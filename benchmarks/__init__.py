@@ -0,0 +1 @@
+"""Benchmarks for the budget tracker. Run them from the repository root with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,173 @@
+"""Benchmark every BudgetTracker operation against synthetic ledgers.
+
+    python -m benchmarks.run --sizes 10000 100000 1000000 --output after.json
+    python -m benchmarks.run --compare before.json after.json --threshold 0.2
+
+Each operation is timed ``--repeat`` times on a freshly imported ledger and the median
+seconds per call is recorded; the two imports (into the empty ledger and a further 10% into the
+populated one) are timed once. ``view_summary`` is timed with plotting stubbed out, so it
+measures data preparation only. Compare mode exits with status 1 if any operation got
+slower than ``threshold`` relative to the first run.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import matplotlib
+
+matplotlib.use("Agg")
+matplotlib.rcParams["figure.max_open_warning"] = 0
+
+import matplotlib.pyplot  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BudgetTracker import BudgetTracker  # noqa: E402
+from benchmarks.synthetic import CATEGORIES, generate_transactions  # noqa: E402
+
+DEFAULT_SIZES = (10000, 100000)
+
+
+def time_call(func: Callable[[], Any], repeat: int) -> float:
+    """Return the median wall time of ``repeat`` calls, with stdout discarded."""
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def benchmark_size(size: int, repeat: int, seed: int, workdir: str) -> Dict[str, float]:
+    db_file = os.path.join(workdir, f"bench_{size}.db")
+    if os.path.exists(db_file):
+        os.remove(db_file)
+    # Uncached, so repeated reads measure the queries themselves; the *_cached entries below
+    # measure the same reads served from the query cache of a second tracker.
+    tracker = BudgetTracker(db_file, initial_amount=1000.0, cache_size=0)
+    tracker._plot_summary = lambda *args: None
+    rng = random.Random(seed)
+    results = {}
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracker.import_transactions(generate_transactions(size, seed), skip_duplicates=False)
+    results["import_transactions"] = time.perf_counter() - started
+
+    first_date, last_date = tracker.conn.execute("SELECT MIN(date), MAX(date) FROM transactions").fetchone()
+    max_id = tracker.conn.execute("SELECT MAX(id) FROM transactions").fetchone()[0]
+    month_start = last_date[:8] + "01"
+    categories = list(CATEGORIES)
+
+    results["add_transaction"] = time_call(
+        lambda: tracker.add_transaction(last_date, rng.choice(categories), "Benchmark", -1.0), repeat)
+    results["calculate_balance"] = time_call(tracker.calculate_balance, repeat)
+    results["view_summary"] = time_call(tracker.view_summary, repeat)
+    results["view_summary_month"] = time_call(lambda: tracker.view_summary(month_start, last_date), repeat)
+    results["filter_transactions_category_month"] = time_call(
+        lambda: tracker.filter_transactions(rng.choice(categories), month_start, last_date), repeat)
+    results["filter_transactions_first_page"] = time_call(
+        lambda: tracker.filter_transactions(rng.choice(categories), first_date, None, limit=100), repeat)
+    results["get_categories"] = time_call(tracker.get_categories, repeat)
+    results["modify_transaction"] = time_call(
+        lambda: tracker.modify_transaction(rng.randint(2, max_id), amount=-2.0, category=rng.choice(categories)), repeat)
+    results["delete_transaction"] = time_call(lambda: tracker.delete_transaction(rng.randint(2, max_id)), repeat)
+
+    cached = BudgetTracker(db_file)
+    cached._plot_summary = lambda *args: None
+    results["calculate_balance_cached"] = time_call(cached.calculate_balance, repeat)
+    results["view_summary_cached"] = time_call(cached.view_summary, repeat)
+    results["get_categories_cached"] = time_call(cached.get_categories, repeat)
+
+    # Last, since it grows the ledger: a 10% import into the populated ledger with deduplication,
+    # where per-row triggers would also shift the balance checkpoints of every later month.
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracker.import_transactions(generate_transactions(max(size // 10, 1), seed + 1))
+    results["import_transactions_incremental"] = time.perf_counter() - started
+    matplotlib.pyplot.close("all")
+    cached.conn.close()
+    tracker.conn.close()
+    os.remove(db_file)
+    return results
+
+
+def run(sizes: List[int], repeat: int, seed: int, workdir: str) -> Dict[str, Any]:
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        print(f"Benchmarking {size:,} transactions...")
+        results = benchmark_size(size, repeat, seed, workdir)
+        for name, seconds in results.items():
+            print(f"  {name:<38} {seconds * 1000:12.3f} ms")
+        report["results"][str(size)] = results
+    return report
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any], threshold: float) -> bool:
+    """Print per-operation ratios between two runs and return True if nothing regressed."""
+    ok = True
+    for size, results in after["results"].items():
+        baseline = before["results"].get(size)
+        if baseline is None:
+            continue
+        print(f"{int(size):,} transactions:")
+        for name, seconds in results.items():
+            if name not in baseline:
+                continue
+            ratio = seconds / baseline[name] if baseline[name] else float("inf")
+            regressed = ratio > 1 + threshold
+            ok = ok and not regressed
+            flag = "REGRESSION" if regressed else ""
+            print(f"  {name:<38} {baseline[name] * 1000:10.3f} -> {seconds * 1000:10.3f} ms  x{ratio:5.2f}  {flag}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Budget Tracker benchmark suite")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES), help="Ledger sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed calls per operation (median is reported)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the synthetic ledger")
+    parser.add_argument("--workdir", help="Directory for the temporary databases (default: a temp dir)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown in compare mode (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            before = json.load(f)
+        with open(args.compare[1]) as f:
+            after = json.load(f)
+        return 0 if compare(before, after, args.threshold) else 1
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        report = run(args.sizes, args.repeat, args.seed, workdir)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Startup-time benchmark for the scripted CLI commands.
+
+Times ``tracker_cli.py`` invocations in fresh interpreters and checks that the pandas-free code paths
+never import pandas or matplotlib. Exits with status 1 when a command is slower than ``--max-seconds``,
+slower than a saved baseline by more than ``--tolerance``, or when a heavy module gets imported.
+
+    python -m benchmarks.startup --save startup.json
+    python -m benchmarks.startup --baseline startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, "tracker_cli.py")
+HEAVY_MODULES = ("pandas", "matplotlib")
+COMMANDS = {
+    "import": [sys.executable, "-c", "import BudgetTracker"],
+    "balance": [sys.executable, CLI, "--balance"],
+    "add": [sys.executable, CLI, "--add", "today", "Benchmark", "Startup benchmark", "-1"],
+    "print": [sys.executable, CLI, "--print"],
+}
+SCRIPTED_PATH = """
+import sys
+from BudgetTracker import BudgetTracker
+tracker = BudgetTracker("budget_data.db")
+tracker.add_transaction("2024-01-01", "Benchmark", "Heavy import check", -1.0)
+tracker.calculate_balance()
+tracker.get_categories()
+tracker.print_transactions()
+tracker.delete_transaction(tracker.conn.execute("SELECT MAX(id) FROM transactions").fetchone()[0])
+print("HEAVY=" + ",".join(m for m in %r if m in sys.modules))
+""" % (HEAVY_MODULES,)
+
+
+def run(command: List[str], workdir: str) -> float:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    started = time.perf_counter()
+    subprocess.run(command, cwd=workdir, env=env, check=True, stdin=subprocess.DEVNULL,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return time.perf_counter() - started
+
+
+def heavy_imports(workdir: str) -> List[str]:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run([sys.executable, "-c", SCRIPTED_PATH], cwd=workdir, env=env, check=True,
+                            stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    line = [line for line in result.stdout.splitlines() if line.startswith("HEAVY=")][-1]
+    return [name for name in line[len("HEAVY="):].split(",") if name]
+
+
+def measure(runs: int) -> Dict[str, float]:
+    sys.path.insert(0, ROOT)
+    from BudgetTracker import BudgetTracker
+
+    with tempfile.TemporaryDirectory() as workdir:
+        BudgetTracker(os.path.join(workdir, "budget_data.db"), initial_amount=1000.0).conn.close()
+        results = {}
+        for name, command in COMMANDS.items():
+            run(command, workdir)  # warm the OS file cache
+            results[name] = statistics.median(run(command, workdir) for _ in range(runs))
+        results["heavy_imports"] = heavy_imports(workdir)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Budget Tracker startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per command (median is reported)")
+    parser.add_argument("--max-seconds", type=float, default=0.5, help="Absolute limit for every command")
+    parser.add_argument("--baseline", help="JSON file from a previous --save to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown over the baseline (0.25 = 25%%)")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    failures = []
+    for name in COMMANDS:
+        seconds = results[name]
+        status = "ok"
+        if seconds > args.max_seconds:
+            status = f"over {args.max_seconds:.2f}s limit"
+        elif name in baseline and seconds > baseline[name] * (1 + args.tolerance):
+            status = f"regressed from {baseline[name]:.3f}s"
+        if status != "ok":
+            failures.append(name)
+        print(f"{name:<10} {seconds:8.3f}s  {status}")
+    if results["heavy_imports"]:
+        failures.append("heavy_imports")
+        print(f"scripted commands imported {', '.join(results['heavy_imports'])}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
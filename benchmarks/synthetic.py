@@ -0,0 +1,48 @@
+"""Deterministic synthetic ledger generator for benchmarks."""
+import random
+from datetime import date, timedelta
+from typing import Iterator, Tuple
+
+# category: (descriptions, min amount, max amount, relative frequency)
+CATEGORIES = {
+    "Groceries": (("Supermarket", "Farmers market", "Bakery", "Butcher"), -120.0, -5.0, 30),
+    "Food": (("Lunch at cafe", "Pizza delivery", "Coffee", "Dinner out"), -60.0, -2.5, 25),
+    "Transport": (("Metro ticket", "Fuel", "Taxi", "Train ticket", "Parking"), -80.0, -1.5, 15),
+    "Shopping": (("Amazon order", "Clothes", "Electronics", "Books"), -400.0, -8.0, 10),
+    "Utilities": (("Electricity bill", "Water bill", "Internet", "Phone plan"), -150.0, -15.0, 4),
+    "Entertainment": (("Cinema", "Concert tickets", "Streaming subscription", "Museum"), -90.0, -7.0, 6),
+    "Health": (("Pharmacy", "Dentist", "Gym membership"), -200.0, -10.0, 3),
+    "Travel": (("Hotel booking", "Flight", "Car rental"), -900.0, -60.0, 1),
+    "Income": (("Freelance payment", "Refund", "Sold item"), 20.0, 800.0, 2),
+}
+MONTHLY = (("Salary", "Monthly salary", 2800.0), ("Rent", "Apartment rent", -950.0))
+TRANSACTIONS_PER_DAY = 12
+MAX_YEARS = 30
+
+
+def generate_transactions(count: int, seed: int = 42, start: date = date(2015, 1, 1)) -> Iterator[Tuple[str, str, str, float]]:
+    """Yield ``count`` (date, category, description, amount) rows in date order.
+
+    The same ``count`` and ``seed`` always produce the same ledger. Rows are spread over
+    roughly ``count / TRANSACTIONS_PER_DAY`` days (at least one year, at most ``MAX_YEARS``;
+    larger ledgers get busier days), with a salary and a rent payment on the first of every month.
+    """
+    rng = random.Random(seed)
+    names = list(CATEGORIES)
+    weights = [CATEGORIES[name][3] for name in names]
+    span = min(max(365, count // TRANSACTIONS_PER_DAY), MAX_YEARS * 365)
+    emitted = 0
+    for day_index in range(span):
+        day = start + timedelta(days=day_index)
+        iso = day.isoformat()
+        target = (day_index + 1) * count // span
+        if day.day == 1:
+            for category, description, amount in MONTHLY:
+                if emitted < count:
+                    yield iso, category, description, amount
+                    emitted += 1
+        while emitted < target:
+            category = rng.choices(names, weights)[0]
+            descriptions, low, high, _ = CATEGORIES[category]
+            yield iso, category, rng.choice(descriptions), round(rng.uniform(low, high), 2)
+            emitted += 1
@@ -0,0 +1,204 @@
+"""Vectorized balance forecasting with recurring-transaction detection.
+
+Every model works on NumPy arrays built from a LedgerArrays view: the calendar-filled daily
+balance series (int64 cents) and, for the recurring model, the transactions themselves. All
+models are computed in one batch over the whole horizon and return a mean path plus a
+confidence band, in cents.
+
+- ``linear``: least-squares trend of the balance with a regression prediction interval.
+- ``seasonal``: mean and variance of the daily change for each calendar month, accumulated.
+- ``recurring``: recurring rules (``recurring.py``) and detected recurring transactions (rent,
+  salary, subscriptions) projected on their schedule, plus the mean of the remaining daily
+  changes. A rule replaces the detected series with the same description and sign.
+"""
+from datetime import timedelta
+from statistics import NormalDist
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ledger import EPOCH, LedgerArrays, from_day, to_day
+from recurring import RecurringRule, add_months, iter_occurrences
+
+MODELS = ("linear", "seasonal", "recurring")
+# Candidate periods in days: weekly, biweekly, monthly, quarterly, yearly.
+KNOWN_PERIODS = (7, 14, 30, 91, 365)
+PERIOD_NAMES = {7: "weekly", 14: "biweekly", 30: "monthly", 91: "quarterly", 365: "yearly"}
+PERIOD_TOLERANCE = 0.15
+AMOUNT_TOLERANCE = 0.2
+MIN_OCCURRENCES = 3
+MIN_REGULAR_SHARE = 0.75
+
+
+class RecurringSeries(NamedTuple):
+    description: str
+    category: str
+    amount_cents: int
+    period_days: int
+    last_day: int
+    occurrences: int
+
+
+class Forecast(NamedTuple):
+    model: str
+    days: np.ndarray
+    mean: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+
+
+def project_occurrences(series: RecurringSeries, until_day: int) -> np.ndarray:
+    """Return the day numbers of the occurrences of a series after its last one, up to ``until_day``."""
+    if series.period_days not in (30, 91, 365):
+        return np.arange(series.last_day + series.period_days, until_day + 1, series.period_days, dtype=np.int32)
+    months = {30: 1, 91: 3, 365: 12}[series.period_days]
+    last = EPOCH + timedelta(days=series.last_day)
+    days = []
+    step = 1
+    while True:
+        day = (add_months(last, months * step) - EPOCH).days
+        if day > until_day:
+            break
+        days.append(day)
+        step += 1
+    return np.array(days, dtype=np.int32)
+
+
+def rule_occurrences(rule: RecurringRule, first_day: int, last_day: int) -> np.ndarray:
+    """Return the day numbers of the occurrences of a rule between two day numbers, inclusive."""
+    first = from_day(first_day)
+    return np.array([to_day(day) for _, day in iter_occurrences(rule, from_day(last_day)) if day >= first],
+                    dtype=np.int32)
+
+
+def _regular(values: np.ndarray, target: float, tolerance: float) -> bool:
+    return bool(np.mean(np.abs(values - target) <= tolerance) >= MIN_REGULAR_SHARE)
+
+
+def detect_recurring(ledger: LedgerArrays, min_occurrences: int = MIN_OCCURRENCES) -> List[RecurringSeries]:
+    """Find transactions that repeat with the same description, a stable amount and a regular period.
+
+    Series whose last occurrence is more than two periods before the end of the ledger are
+    treated as ended and left out.
+    """
+    if not len(ledger):
+        return []
+    income = (ledger.cents >= 0).astype(np.int32)
+    order = np.lexsort((ledger.days, income, ledger.description_codes))
+    codes, signs = ledger.description_codes[order], income[order]
+    boundaries = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (signs[1:] != signs[:-1]), True])
+    end_of_ledger = int(ledger.days[-1])
+    found = []
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        if end - start < min_occurrences:
+            continue
+        members = order[start:end]
+        days = ledger.days[members]
+        intervals = np.diff(days)
+        intervals = intervals[intervals > 0]
+        if len(intervals) < min_occurrences - 1:
+            continue
+        median_interval = float(np.median(intervals))
+        period = min(KNOWN_PERIODS, key=lambda p: abs(p - median_interval) / p)
+        if not _regular(intervals, period, max(1.0, PERIOD_TOLERANCE * period)):
+            continue
+        amounts = ledger.cents[members]
+        typical = float(np.median(amounts[-min_occurrences:]))
+        if not _regular(amounts, typical, AMOUNT_TOLERANCE * abs(typical)):
+            continue
+        last_day = int(days[-1])
+        if end_of_ledger - last_day > 2 * period:
+            continue
+        category = ledger.categories[int(np.bincount(ledger.category_codes[members]).argmax())]
+        found.append(RecurringSeries(ledger.descriptions[int(codes[start])], category, int(round(typical)),
+                                     period, last_day, len(members)))
+    return found
+
+
+def linear_model(days: np.ndarray, balance: np.ndarray, future: np.ndarray, z: float) -> Forecast:
+    x = days.astype(np.float64)
+    slope, intercept = np.polyfit(x, balance.astype(np.float64), 1)
+    residuals = balance - (slope * x + intercept)
+    sigma = np.sqrt(np.sum(residuals ** 2) / max(len(x) - 2, 1))
+    spread = np.sum((x - x.mean()) ** 2) or 1.0
+    mean = slope * future + intercept
+    width = z * sigma * np.sqrt(1 + 1 / len(x) + (future - x.mean()) ** 2 / spread)
+    return Forecast("linear", future, mean, mean - width, mean + width)
+
+
+def seasonal_model(days: np.ndarray, balance: np.ndarray, future: np.ndarray, z: float) -> Forecast:
+    deltas = np.diff(balance).astype(np.float64)
+    months = _month_of_year(days[1:])
+    counts = np.bincount(months, minlength=12)
+    sums = np.bincount(months, weights=deltas, minlength=12)
+    squares = np.bincount(months, weights=deltas ** 2, minlength=12)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / counts, deltas.mean())
+        variances = np.where(counts > 1, squares / counts - means ** 2, deltas.var())
+    future_months = _month_of_year(future)
+    mean = balance[-1] + np.cumsum(means[future_months])
+    width = z * np.sqrt(np.cumsum(np.maximum(variances[future_months], 0.0)))
+    return Forecast("seasonal", future, mean, mean - width, mean + width)
+
+
+def recurring_model(ledger: LedgerArrays, days: np.ndarray, balance: np.ndarray, future: np.ndarray,
+                    recurring: Sequence[RecurringSeries], z: float, rules: Sequence[RecurringRule] = ()) -> Forecast:
+    codes = {description: code for code, description in enumerate(ledger.descriptions)}
+    in_series = np.zeros(len(ledger), dtype=bool)
+    scheduled = np.zeros(len(future), dtype=np.float64)
+    for series in list(recurring) + list(rules):
+        code = codes.get(series.description)
+        if code is not None:
+            in_series |= (ledger.description_codes == code) & ((ledger.cents >= 0) == (series.amount_cents >= 0))
+        if isinstance(series, RecurringRule):
+            occurrences = rule_occurrences(series, int(future[0]), int(future[-1]))
+        else:
+            occurrences = project_occurrences(series, int(future[-1]))
+            occurrences = occurrences[occurrences >= future[0]]
+        np.add.at(scheduled, occurrences - int(future[0]), series.amount_cents)
+    # Daily change of everything that is not part of a recurring series.
+    first = int(days[0])
+    kept = ~in_series & (ledger.days >= first)
+    residual = np.bincount(ledger.days[kept] - first, weights=ledger.cents[kept], minlength=len(days))[1:]
+    steps = np.arange(1, len(future) + 1)
+    mean = balance[-1] + np.cumsum(scheduled) + residual.mean() * steps
+    width = z * residual.std() * np.sqrt(steps)
+    return Forecast("recurring", future, mean, mean - width, mean + width)
+
+
+def _month_of_year(days: np.ndarray) -> np.ndarray:
+    return (np.datetime64(EPOCH, "D") + days.astype("timedelta64[D]")).astype("datetime64[M]").astype(np.int64) % 12
+
+
+def forecast(ledger: LedgerArrays,
+             horizon: int,
+             opening_cents: int = 0,
+             models: Sequence[str] = MODELS,
+             confidence: float = 0.9,
+             recurring: Optional[Sequence[RecurringSeries]] = None,
+             rules: Sequence[RecurringRule] = ()) -> Tuple[Dict[str, Forecast], List[RecurringSeries]]:
+    """Forecast the daily balance ``horizon`` days past the last transaction with every requested model.
+
+    ``rules`` are projected on their exact schedule by the recurring model. Returns the forecasts
+    by model name (empty if there are fewer than two days of history) and the recurring series
+    that were detected or passed in, minus those a rule replaces.
+    """
+    unknown = set(models) - set(MODELS)
+    if unknown:
+        raise ValueError(f"Unknown forecast models: {', '.join(sorted(unknown))}")
+    days, balance = ledger.balance_series(opening_cents)
+    recurring = list(detect_recurring(ledger) if recurring is None else recurring)
+    ruled = {(rule.description, rule.amount_cents >= 0) for rule in rules}
+    recurring = [series for series in recurring if (series.description, series.amount_cents >= 0) not in ruled]
+    if len(days) < 2 or horizon <= 0:
+        return {}, recurring
+    future = days[-1] + np.arange(1, horizon + 1, dtype=np.int64)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    results = {}
+    if "linear" in models:
+        results["linear"] = linear_model(days, balance, future, z)
+    if "seasonal" in models:
+        results["seasonal"] = seasonal_model(days, balance, future, z)
+    if "recurring" in models:
+        results["recurring"] = recurring_model(ledger, days, balance, future, recurring, z, rules)
+    return results, recurring
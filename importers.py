@@ -0,0 +1,97 @@
+import csv
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from money import to_cents
+from recurring import parse_date
+
+Row = Tuple[str, str, str, int]
+
+CSV_COLUMNS = ("date", "category", "description", "amount")
+OFX_TAG = re.compile(r"<(\w+)>([^<\r\n]*)")
+OFX_DATE_FORMAT = "%Y%m%d"
+
+
+def read_csv_rows(path: str, default_category: str = "Uncategorized") -> Iterator[Dict[str, Any]]:
+    """Stream raw rows from a CSV file with date, category, description and amount columns.
+
+    Rows without a category (no column, or a blank cell) get ``default_category``.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+        missing = [col for col in ("date", "description", "amount") if col not in fields]
+        if missing:
+            raise ValueError(f"CSV file {path} is missing required columns: {', '.join(missing)}")
+        for row in reader:
+            category = (row[fields["category"]] or "").strip() if "category" in fields else ""
+            yield {
+                "date": row[fields["date"]],
+                "category": category or default_category,
+                "description": row[fields["description"]],
+                "amount": row[fields["amount"]],
+            }
+
+
+def read_ofx_rows(path: str, default_category: str = "Uncategorized") -> Iterator[Dict[str, Any]]:
+    """Stream raw rows from the STMTTRN blocks of an OFX (SGML or XML) statement."""
+    current: Optional[Dict[str, str]] = None
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            for tag, value in OFX_TAG.findall(line):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    current = {}
+                elif current is not None:
+                    current[tag] = value.strip()
+            if current is not None and "</STMTTRN>" in line.upper():
+                posted = current.get("DTPOSTED", "")[:8]
+                try:
+                    date = datetime.strptime(posted, OFX_DATE_FORMAT).strftime("%Y-%m-%d")
+                except ValueError:
+                    date = posted
+                yield {
+                    "date": date,
+                    "category": default_category,
+                    "description": current.get("NAME") or current.get("MEMO", ""),
+                    "amount": current.get("TRNAMT", ""),
+                }
+                current = None
+
+
+def iter_source_rows(source: Any, format: Optional[str] = None, default_category: str = "Uncategorized") -> Iterable[Any]:
+    """Return a lazy row iterable for a file path or pass an in-memory iterable through."""
+    if not isinstance(source, str):
+        return source
+    if format is None:
+        format = "ofx" if source.lower().endswith((".ofx", ".qfx")) else "csv"
+    if format == "csv":
+        return read_csv_rows(source, default_category)
+    if format == "ofx":
+        return read_ofx_rows(source, default_category)
+    raise ValueError(f"Unsupported import format: {format}")
+
+
+def validate_rows(rows: Iterable[Any]) -> Iterator[Row]:
+    """Validate and normalize rows into (date, category, description, amount_cents) tuples."""
+    for line, row in enumerate(rows, start=1):
+        if isinstance(row, dict):
+            row = tuple(row.get(col) for col in CSV_COLUMNS)
+        try:
+            date, category, description, amount = row
+        except (TypeError, ValueError):
+            raise ValueError(f"Row {line}: expected {len(CSV_COLUMNS)} fields, got {row!r}")
+        date = str(date or "").strip()
+        try:
+            parse_date(date)
+        except ValueError:
+            raise ValueError(f"Row {line}: invalid date {date!r}, expected YYYY-MM-DD")
+        category = str(category or "").strip()
+        if not category:
+            raise ValueError(f"Row {line}: category must not be empty")
+        try:
+            amount = to_cents(amount)
+        except ValueError:
+            raise ValueError(f"Row {line}: invalid amount {amount!r}")
+        yield date, category, str(description or "").strip(), amount
@@ -0,0 +1,103 @@
+"""Array-backed, read-only view of the ledger for vectorized NumPy analysis.
+
+Transactions are held column-wise in compact arrays: dates as int32 day numbers (days since
+1970-01-01), amounts as int64 cents, and categories and descriptions as int32 codes into small
+lists of distinct names. Sums over int64 cents are exact, so summaries, balance series and
+forecasts computed here do not drift the way float sums do.
+"""
+import sqlite3
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+EPOCH = date(1970, 1, 1)
+ROW_DTYPE = np.dtype([("id", np.int64), ("day", np.int32), ("category", np.int32), ("description", np.int32),
+                      ("cents", np.int64)])
+
+
+def to_day(value: str) -> int:
+    """Convert a YYYY-MM-DD string to a day number."""
+    return (date.fromisoformat(value) - EPOCH).days
+
+
+def from_day(day: int) -> str:
+    """Convert a day number back to a YYYY-MM-DD string."""
+    return (EPOCH + timedelta(days=int(day))).isoformat()
+
+
+class LedgerArrays:
+    """Column arrays of the transactions, sorted by (date, id)."""
+
+    def __init__(self, ids: np.ndarray, days: np.ndarray, category_codes: np.ndarray, description_codes: np.ndarray,
+                 cents: np.ndarray, categories: List[str], descriptions: List[str]):
+        self.ids = ids
+        self.days = days
+        self.category_codes = category_codes
+        self.description_codes = description_codes
+        self.cents = cents
+        self.categories = categories
+        self.descriptions = descriptions
+
+    @classmethod
+    def from_connection(cls, conn: sqlite3.Connection, start_date: Optional[str] = None,
+                        end_date: Optional[str] = None) -> "LedgerArrays":
+        """Load the transactions of an optional date range into arrays in a single pass."""
+        query = """
+            SELECT id, CAST(julianday(date) - 2440587.5 AS INTEGER), category_id, description, amount_cents
+            FROM transactions WHERE 1=1
+        """
+        params = []
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+        categories: Dict[int, int] = {}
+        descriptions: Dict[str, int] = {}
+
+        def encoded():
+            for transaction_id, day, category_id, description, cents in conn.execute(query + " ORDER BY date, id", params):
+                if day is None:
+                    raise ValueError(f"Transaction {transaction_id} has an invalid date, expected YYYY-MM-DD")
+                yield (transaction_id, day, categories.setdefault(category_id, len(categories)),
+                       descriptions.setdefault(description, len(descriptions)), cents)
+
+        rows = np.fromiter(encoded(), dtype=ROW_DTYPE)
+        names = dict(conn.execute("SELECT id, name FROM categories"))
+        return cls(rows["id"].copy(), rows["day"].copy(), rows["category"].copy(), rows["description"].copy(),
+                   rows["cents"].copy(), [names[category_id] for category_id in categories], list(descriptions))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def balance_cents(self) -> int:
+        """Return the sum of all amounts in cents."""
+        return int(self.cents.sum())
+
+    def category_totals(self) -> Dict[str, int]:
+        """Return the total in cents of every category."""
+        totals = np.zeros(len(self.categories), dtype=np.int64)
+        np.add.at(totals, self.category_codes, self.cents)
+        return dict(zip(self.categories, totals.tolist()))
+
+    def daily_totals(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the days that have transactions and the net cents of each of them."""
+        if not len(self):
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+        starts = np.flatnonzero(np.r_[True, self.days[1:] != self.days[:-1]])
+        return self.days[starts], np.add.reduceat(self.cents, starts)
+
+    def balance_series(self, opening_cents: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Return every calendar day from the first to the last transaction and the closing balance of each.
+
+        ``opening_cents`` is the balance before the first loaded transaction, for views loaded
+        with a start date.
+        """
+        days, totals = self.daily_totals()
+        if not len(days):
+            return days, totals
+        calendar = np.arange(days[0], days[-1] + 1, dtype=np.int32)
+        closing = np.cumsum(totals) + opening_cents
+        return calendar, closing[np.searchsorted(days, calendar, side="right") - 1]
@@ -0,0 +1,1016 @@
+"""Versioned schema migrations, tracked through ``PRAGMA user_version``.
+
+Each migration function is a frozen snapshot of the schema change it made: later changes add a
+new migration instead of editing an old one, and the helpers without a version suffix
+(``rebuild_rollups``, ``rebuild_search_index``, ``rebuild_balance_checkpoints``,
+``rebuild_category_usage``, ``rebuild_month_versions``, ``fold_bulk_inserts``) always describe
+the current schema.
+"""
+import sqlite3
+from typing import Callable, List, Sequence, Tuple
+
+from money import to_cents
+
+Migration = Tuple[int, str, Callable[[sqlite3.Connection], None]]
+
+
+def create_transactions_table(conn: sqlite3.Connection) -> None:
+    """Create the base transactions table and the import dedup index."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            category TEXT NOT NULL,
+            description TEXT NOT NULL,
+            amount REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_dedup
+        ON transactions (date, amount, description)
+    """)
+
+
+def add_query_indexes(conn: sqlite3.Connection) -> None:
+    """Add covering indexes for the date-range and category predicates used by the tracker."""
+    # Date ranges, the balance window (ORDER BY date) and per-range category totals.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_date_category
+        ON transactions (date, category, amount)
+    """)
+    # Category filters (optionally with a date range), DISTINCT category and GROUP BY category.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_category_date
+        ON transactions (category, date, amount)
+    """)
+    conn.execute("ANALYZE")
+
+
+ROLLUP_TRIGGERS_V3 = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO daily_totals (day, category, total, count)
+        VALUES (NEW.date, NEW.category, NEW.amount, 1)
+        ON CONFLICT (day, category) DO UPDATE SET total = total + excluded.total, count = count + 1;
+        INSERT INTO monthly_totals (month, category, total, count)
+        VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.amount, 1)
+        ON CONFLICT (month, category) DO UPDATE SET total = total + excluded.total, count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        UPDATE daily_totals SET total = total - OLD.amount, count = count - 1
+        WHERE day = OLD.date AND category = OLD.category;
+        DELETE FROM daily_totals WHERE day = OLD.date AND category = OLD.category AND count = 0;
+        UPDATE monthly_totals SET total = total - OLD.amount, count = count - 1
+        WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category;
+        DELETE FROM monthly_totals WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category AND count = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_update
+    AFTER UPDATE OF date, category, amount ON transactions
+    BEGIN
+        UPDATE daily_totals SET total = total - OLD.amount, count = count - 1
+        WHERE day = OLD.date AND category = OLD.category;
+        DELETE FROM daily_totals WHERE day = OLD.date AND category = OLD.category AND count = 0;
+        UPDATE monthly_totals SET total = total - OLD.amount, count = count - 1
+        WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category;
+        DELETE FROM monthly_totals WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category AND count = 0;
+        INSERT INTO daily_totals (day, category, total, count)
+        VALUES (NEW.date, NEW.category, NEW.amount, 1)
+        ON CONFLICT (day, category) DO UPDATE SET total = total + excluded.total, count = count + 1;
+        INSERT INTO monthly_totals (month, category, total, count)
+        VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.amount, 1)
+        ON CONFLICT (month, category) DO UPDATE SET total = total + excluded.total, count = count + 1;
+    END
+    """,
+]
+
+
+def rebuild_rollups_v3(conn: sqlite3.Connection) -> None:
+    """Recompute the REAL-valued rollup tables of schema version 3."""
+    conn.execute("DELETE FROM daily_totals")
+    conn.execute("DELETE FROM monthly_totals")
+    conn.execute("""
+        INSERT INTO daily_totals (day, category, total, count)
+        SELECT date, category, SUM(amount), COUNT(*) FROM transactions GROUP BY date, category
+    """)
+    conn.execute("""
+        INSERT INTO monthly_totals (month, category, total, count)
+        SELECT substr(day, 1, 7), category, SUM(total), SUM(count) FROM daily_totals
+        GROUP BY substr(day, 1, 7), category
+    """)
+
+
+def add_rollup_tables(conn: sqlite3.Connection) -> None:
+    """Add (day, category) and (month, category) rollups kept in sync by triggers."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            day TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total REAL NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, category)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_totals (
+            month TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total REAL NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (month, category)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_monthly_totals_category
+        ON monthly_totals (category, total)
+    """)
+    for trigger in ROLLUP_TRIGGERS_V3:
+        conn.execute(trigger)
+    rebuild_rollups_v3(conn)
+
+
+def add_keyset_indexes(conn: sqlite3.Connection) -> None:
+    """Replace the aggregate covering indexes with (date) and (category, date) for keyset pagination.
+
+    Totals are served by the rollup tables now, so the indexes only need to order rows by
+    (date, id) within each predicate; the rowid SQLite appends to every index provides the id.
+    """
+    conn.execute("DROP INDEX IF EXISTS idx_transactions_date_category")
+    conn.execute("DROP INDEX IF EXISTS idx_transactions_category_date")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category, date)")
+    conn.execute("ANALYZE")
+
+
+DATA_VERSION_TRIGGERS_V5 = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_version_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        UPDATE ledger_state SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_version_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        UPDATE ledger_state SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_version_update
+    AFTER UPDATE ON transactions
+    BEGIN
+        UPDATE ledger_state SET version = version + 1;
+    END
+    """,
+]
+
+
+def add_data_version(conn: sqlite3.Connection) -> None:
+    """Add a persistent ledger data version that every write to transactions increments."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ledger_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO ledger_state (id, version) VALUES (1, 0)")
+    for trigger in DATA_VERSION_TRIGGERS_V5:
+        conn.execute(trigger)
+
+
+ROLLUP_TRIGGERS_V6 = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO daily_totals (day, category, total_cents, count)
+        VALUES (NEW.date, NEW.category, NEW.amount_cents, 1)
+        ON CONFLICT (day, category) DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+        INSERT INTO monthly_totals (month, category, total_cents, count)
+        VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.amount_cents, 1)
+        ON CONFLICT (month, category) DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        UPDATE daily_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+        WHERE day = OLD.date AND category = OLD.category;
+        DELETE FROM daily_totals WHERE day = OLD.date AND category = OLD.category AND count = 0;
+        UPDATE monthly_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+        WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category;
+        DELETE FROM monthly_totals WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category AND count = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_update
+    AFTER UPDATE OF date, category, amount_cents ON transactions
+    BEGIN
+        UPDATE daily_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+        WHERE day = OLD.date AND category = OLD.category;
+        DELETE FROM daily_totals WHERE day = OLD.date AND category = OLD.category AND count = 0;
+        UPDATE monthly_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+        WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category;
+        DELETE FROM monthly_totals WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category AND count = 0;
+        INSERT INTO daily_totals (day, category, total_cents, count)
+        VALUES (NEW.date, NEW.category, NEW.amount_cents, 1)
+        ON CONFLICT (day, category) DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+        INSERT INTO monthly_totals (month, category, total_cents, count)
+        VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.amount_cents, 1)
+        ON CONFLICT (month, category) DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+    END
+    """,
+]
+
+
+SEARCH_TRIGGERS_V7 = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_search_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO transactions_fts (rowid, description, category) VALUES (NEW.id, NEW.description, NEW.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_search_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+        VALUES ('delete', OLD.id, OLD.description, OLD.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_search_update
+    AFTER UPDATE OF description, category ON transactions
+    BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+        VALUES ('delete', OLD.id, OLD.description, OLD.category);
+        INSERT INTO transactions_fts (rowid, description, category) VALUES (NEW.id, NEW.description, NEW.category);
+    END
+    """,
+]
+
+
+BALANCE_TRIGGERS_V8 = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_balance_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO balance_checkpoints (month, opening_cents, net_cents)
+        VALUES (substr(NEW.date, 1, 7),
+                COALESCE((SELECT opening_cents + net_cents FROM balance_checkpoints
+                          WHERE month < substr(NEW.date, 1, 7) ORDER BY month DESC LIMIT 1), 0),
+                NEW.amount_cents)
+        ON CONFLICT (month) DO UPDATE SET net_cents = net_cents + excluded.net_cents;
+        UPDATE balance_checkpoints SET opening_cents = opening_cents + NEW.amount_cents
+        WHERE month > substr(NEW.date, 1, 7);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_balance_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        UPDATE balance_checkpoints SET net_cents = net_cents - OLD.amount_cents WHERE month = substr(OLD.date, 1, 7);
+        UPDATE balance_checkpoints SET opening_cents = opening_cents - OLD.amount_cents
+        WHERE month > substr(OLD.date, 1, 7);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_balance_update
+    AFTER UPDATE OF date, amount_cents ON transactions
+    BEGIN
+        UPDATE balance_checkpoints SET net_cents = net_cents - OLD.amount_cents WHERE month = substr(OLD.date, 1, 7);
+        UPDATE balance_checkpoints SET opening_cents = opening_cents - OLD.amount_cents
+        WHERE month > substr(OLD.date, 1, 7);
+        INSERT INTO balance_checkpoints (month, opening_cents, net_cents)
+        VALUES (substr(NEW.date, 1, 7),
+                COALESCE((SELECT opening_cents + net_cents FROM balance_checkpoints
+                          WHERE month < substr(NEW.date, 1, 7) ORDER BY month DESC LIMIT 1), 0),
+                NEW.amount_cents)
+        ON CONFLICT (month) DO UPDATE SET net_cents = net_cents + excluded.net_cents;
+        UPDATE balance_checkpoints SET opening_cents = opening_cents + NEW.amount_cents
+        WHERE month > substr(NEW.date, 1, 7);
+    END
+    """,
+]
+
+
+MONTH_VERSION_TRIGGERS_V9 = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_month_version_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO month_versions (month, version) VALUES (substr(NEW.date, 1, 7), 1)
+        ON CONFLICT (month) DO UPDATE SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_month_version_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        UPDATE month_versions SET version = version + 1 WHERE month = substr(OLD.date, 1, 7);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_month_version_update
+    AFTER UPDATE ON transactions
+    BEGIN
+        UPDATE month_versions SET version = version + 1 WHERE month = substr(OLD.date, 1, 7);
+        INSERT INTO month_versions (month, version) VALUES (substr(NEW.date, 1, 7), 1)
+        ON CONFLICT (month) DO UPDATE SET version = version + 1 WHERE substr(NEW.date, 1, 7) != substr(OLD.date, 1, 7);
+    END
+    """,
+]
+
+
+def rebuild_rollups_v6(conn: sqlite3.Connection) -> None:
+    """Recompute the category-name keyed rollup tables of schema version 6."""
+    conn.execute("DELETE FROM daily_totals")
+    conn.execute("DELETE FROM monthly_totals")
+    conn.execute("""
+        INSERT INTO daily_totals (day, category, total_cents, count)
+        SELECT date, category, SUM(amount_cents), COUNT(*) FROM transactions GROUP BY date, category
+    """)
+    conn.execute("""
+        INSERT INTO monthly_totals (month, category, total_cents, count)
+        SELECT substr(day, 1, 7), category, SUM(total_cents), SUM(count) FROM daily_totals
+        GROUP BY substr(day, 1, 7), category
+    """)
+
+
+def store_amounts_as_cents(conn: sqlite3.Connection) -> None:
+    """Rebuild transactions and the rollups with exact INTEGER amounts in minor units (cents)."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'").fetchone()
+    sequence = row[0] if row else 0
+    # ROUND(amount * 100) truncates binary halves (1.005 -> 100, 0.285 -> 28); convert in Python instead.
+    conn.create_function("to_cents", 1, to_cents, deterministic=True)
+    conn.execute("""
+        CREATE TABLE transactions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            category TEXT NOT NULL,
+            description TEXT NOT NULL,
+            amount_cents INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""
+        INSERT INTO transactions_new (id, date, category, description, amount_cents)
+        SELECT id, date, category, description, to_cents(amount) FROM transactions
+    """)
+    # Dropping the table also drops its indexes and triggers; they are recreated below.
+    conn.execute("DROP TABLE transactions")
+    conn.execute("ALTER TABLE transactions_new RENAME TO transactions")
+    conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'transactions'", (sequence,))
+    conn.execute("CREATE INDEX idx_transactions_dedup ON transactions (date, amount_cents, description)")
+    conn.execute("CREATE INDEX idx_transactions_date ON transactions (date)")
+    conn.execute("CREATE INDEX idx_transactions_category ON transactions (category, date)")
+
+    conn.execute("DROP TABLE daily_totals")
+    conn.execute("DROP TABLE monthly_totals")
+    conn.execute("""
+        CREATE TABLE daily_totals (
+            day TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total_cents INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, category)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE monthly_totals (
+            month TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total_cents INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (month, category)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX idx_monthly_totals_category ON monthly_totals (category, total_cents)")
+    for trigger in ROLLUP_TRIGGERS_V6 + DATA_VERSION_TRIGGERS_V5:
+        conn.execute(trigger)
+    rebuild_rollups_v6(conn)
+    conn.execute("ANALYZE")
+
+
+def rebuild_search_index_v7(conn: sqlite3.Connection) -> None:
+    """Rebuild the external-content search index of schema version 7 from the transactions table."""
+    conn.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+
+
+def add_search_index(conn: sqlite3.Connection) -> None:
+    """Add an FTS5 index over description and category, kept in sync by triggers.
+
+    The index is an external-content table: it stores only the inverted index and reads the
+    text back from transactions, so it adds little to the database size. Prefix indexes on 2 and
+    3 characters keep type-ahead queries such as ``ama*`` fast.
+    """
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+            description, category,
+            content = 'transactions', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+    """)
+    for trigger in SEARCH_TRIGGERS_V7:
+        conn.execute(trigger)
+    rebuild_search_index_v7(conn)
+
+
+def rebuild_balance_checkpoints(conn: sqlite3.Connection) -> None:
+    """Recompute the monthly balance checkpoints from the monthly rollup."""
+    conn.execute("DELETE FROM balance_checkpoints")
+    conn.execute("""
+        INSERT INTO balance_checkpoints (month, opening_cents, net_cents)
+        SELECT month,
+               COALESCE(SUM(SUM(total_cents)) OVER (ORDER BY month ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0),
+               SUM(total_cents)
+        FROM monthly_totals GROUP BY month
+    """)
+
+
+def add_balance_checkpoints(conn: sqlite3.Connection) -> None:
+    """Add monthly running-balance checkpoints kept in sync by triggers.
+
+    Each month with transactions stores its opening balance and its net change, so the balance at
+    any date is one checkpoint lookup plus at most a month of daily_totals. A write updates its
+    own month and shifts the opening balance of the later months.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS balance_checkpoints (
+            month TEXT PRIMARY KEY,
+            opening_cents INTEGER NOT NULL,
+            net_cents INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    for trigger in BALANCE_TRIGGERS_V8:
+        conn.execute(trigger)
+    rebuild_balance_checkpoints(conn)
+
+
+def add_month_versions(conn: sqlite3.Connection) -> None:
+    """Add a per-month version that every write to a transaction of that month increments.
+
+    Month-partitioned exports compare these versions with the ones they last wrote to find the
+    partitions that need rewriting.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS month_versions (
+            month TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("INSERT OR IGNORE INTO month_versions (month, version) SELECT DISTINCT month, 1 FROM monthly_totals")
+    for trigger in MONTH_VERSION_TRIGGERS_V9:
+        conn.execute(trigger)
+
+
+def category_token(category_id: int) -> str:
+    """Return the token that stands for a category in the category column of transactions_fts."""
+    return f"c{category_id}"
+
+
+ROLLUP_TRIGGERS_V10 = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO daily_totals (day, category_id, total_cents, count)
+        VALUES (NEW.date, NEW.category_id, NEW.amount_cents, 1)
+        ON CONFLICT (day, category_id) DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+        INSERT INTO monthly_totals (month, category_id, total_cents, count)
+        VALUES (substr(NEW.date, 1, 7), NEW.category_id, NEW.amount_cents, 1)
+        ON CONFLICT (month, category_id) DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        UPDATE daily_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+        WHERE day = OLD.date AND category_id = OLD.category_id;
+        DELETE FROM daily_totals WHERE day = OLD.date AND category_id = OLD.category_id AND count = 0;
+        UPDATE monthly_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+        WHERE month = substr(OLD.date, 1, 7) AND category_id = OLD.category_id;
+        DELETE FROM monthly_totals WHERE month = substr(OLD.date, 1, 7) AND category_id = OLD.category_id AND count = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_update
+    AFTER UPDATE OF date, category_id, amount_cents ON transactions
+    BEGIN
+        UPDATE daily_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+        WHERE day = OLD.date AND category_id = OLD.category_id;
+        DELETE FROM daily_totals WHERE day = OLD.date AND category_id = OLD.category_id AND count = 0;
+        UPDATE monthly_totals SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+        WHERE month = substr(OLD.date, 1, 7) AND category_id = OLD.category_id;
+        DELETE FROM monthly_totals WHERE month = substr(OLD.date, 1, 7) AND category_id = OLD.category_id AND count = 0;
+        INSERT INTO daily_totals (day, category_id, total_cents, count)
+        VALUES (NEW.date, NEW.category_id, NEW.amount_cents, 1)
+        ON CONFLICT (day, category_id) DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+        INSERT INTO monthly_totals (month, category_id, total_cents, count)
+        VALUES (substr(NEW.date, 1, 7), NEW.category_id, NEW.amount_cents, 1)
+        ON CONFLICT (month, category_id) DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+    END
+    """,
+]
+
+
+# The category column of transactions_fts holds the category_token() of the row's category, not
+# its name, so renaming a category only reindexes its name in categories_fts.
+SEARCH_TRIGGERS_V10 = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_search_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO transactions_fts (rowid, description, category) VALUES (NEW.id, NEW.description, 'c' || NEW.category_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_search_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+        VALUES ('delete', OLD.id, OLD.description, 'c' || OLD.category_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_search_update
+    AFTER UPDATE OF description, category_id ON transactions
+    BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+        VALUES ('delete', OLD.id, OLD.description, 'c' || OLD.category_id);
+        INSERT INTO transactions_fts (rowid, description, category) VALUES (NEW.id, NEW.description, 'c' || NEW.category_id);
+    END
+    """,
+]
+
+
+CATEGORY_USAGE_TRIGGERS_V10 = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_category_usage_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        UPDATE categories SET usage_count = usage_count + 1 WHERE id = NEW.category_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_category_usage_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        UPDATE categories SET usage_count = usage_count - 1 WHERE id = OLD.category_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_category_usage_update
+    AFTER UPDATE OF category_id ON transactions
+    BEGIN
+        UPDATE categories SET usage_count = usage_count - 1 WHERE id = OLD.category_id;
+        UPDATE categories SET usage_count = usage_count + 1 WHERE id = NEW.category_id;
+    END
+    """,
+]
+
+
+CATEGORY_TRIGGERS_V10 = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_categories_search_insert
+    AFTER INSERT ON categories
+    BEGIN
+        INSERT INTO categories_fts (rowid, name) VALUES (NEW.id, NEW.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_categories_search_delete
+    AFTER DELETE ON categories
+    BEGIN
+        INSERT INTO categories_fts (categories_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_categories_rename
+    AFTER UPDATE OF name ON categories
+    BEGIN
+        INSERT INTO categories_fts (categories_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+        INSERT INTO categories_fts (rowid, name) VALUES (NEW.id, NEW.name);
+        UPDATE ledger_state SET version = version + 1;
+    END
+    """,
+]
+
+
+# Since version 12 the insert triggers do nothing while ledger_state.bulk is set: bulk imports
+# insert with the flag on and fold the new rows in with fold_bulk_inserts() before committing.
+# The delete and update triggers are unchanged since the versions they were added in.
+DATA_VERSION_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_version_insert
+    AFTER INSERT ON transactions WHEN NOT (SELECT bulk FROM ledger_state)
+    BEGIN
+        UPDATE ledger_state SET version = version + 1;
+    END
+    """,
+    *DATA_VERSION_TRIGGERS_V5[1:],
+]
+
+BALANCE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_balance_insert
+    AFTER INSERT ON transactions WHEN NOT (SELECT bulk FROM ledger_state)
+    BEGIN
+        INSERT INTO balance_checkpoints (month, opening_cents, net_cents)
+        VALUES (substr(NEW.date, 1, 7),
+                COALESCE((SELECT opening_cents + net_cents FROM balance_checkpoints
+                          WHERE month < substr(NEW.date, 1, 7) ORDER BY month DESC LIMIT 1), 0),
+                NEW.amount_cents)
+        ON CONFLICT (month) DO UPDATE SET net_cents = net_cents + excluded.net_cents;
+        UPDATE balance_checkpoints SET opening_cents = opening_cents + NEW.amount_cents
+        WHERE month > substr(NEW.date, 1, 7);
+    END
+    """,
+    *BALANCE_TRIGGERS_V8[1:],
+]
+
+MONTH_VERSION_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_month_version_insert
+    AFTER INSERT ON transactions WHEN NOT (SELECT bulk FROM ledger_state)
+    BEGIN
+        INSERT INTO month_versions (month, version) VALUES (substr(NEW.date, 1, 7), 1)
+        ON CONFLICT (month) DO UPDATE SET version = version + 1;
+    END
+    """,
+    *MONTH_VERSION_TRIGGERS_V9[1:],
+]
+
+ROLLUP_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_insert
+    AFTER INSERT ON transactions WHEN NOT (SELECT bulk FROM ledger_state)
+    BEGIN
+        INSERT INTO daily_totals (day, category_id, total_cents, count)
+        VALUES (NEW.date, NEW.category_id, NEW.amount_cents, 1)
+        ON CONFLICT (day, category_id) DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+        INSERT INTO monthly_totals (month, category_id, total_cents, count)
+        VALUES (substr(NEW.date, 1, 7), NEW.category_id, NEW.amount_cents, 1)
+        ON CONFLICT (month, category_id) DO UPDATE SET total_cents = total_cents + excluded.total_cents, count = count + 1;
+    END
+    """,
+    *ROLLUP_TRIGGERS_V10[1:],
+]
+
+SEARCH_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_search_insert
+    AFTER INSERT ON transactions WHEN NOT (SELECT bulk FROM ledger_state)
+    BEGIN
+        INSERT INTO transactions_fts (rowid, description, category) VALUES (NEW.id, NEW.description, 'c' || NEW.category_id);
+    END
+    """,
+    *SEARCH_TRIGGERS_V10[1:],
+]
+
+CATEGORY_USAGE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_category_usage_insert
+    AFTER INSERT ON transactions WHEN NOT (SELECT bulk FROM ledger_state)
+    BEGIN
+        UPDATE categories SET usage_count = usage_count + 1 WHERE id = NEW.category_id;
+    END
+    """,
+    *CATEGORY_USAGE_TRIGGERS_V10[1:],
+]
+
+CATEGORY_TRIGGERS = CATEGORY_TRIGGERS_V10
+
+
+def rebuild_rollups(conn: sqlite3.Connection) -> None:
+    """Recompute the daily and monthly rollup tables from the transactions table."""
+    conn.execute("DELETE FROM daily_totals")
+    conn.execute("DELETE FROM monthly_totals")
+    conn.execute("""
+        INSERT INTO daily_totals (day, category_id, total_cents, count)
+        SELECT date, category_id, SUM(amount_cents), COUNT(*) FROM transactions GROUP BY date, category_id
+    """)
+    conn.execute("""
+        INSERT INTO monthly_totals (month, category_id, total_cents, count)
+        SELECT substr(day, 1, 7), category_id, SUM(total_cents), SUM(count) FROM daily_totals
+        GROUP BY substr(day, 1, 7), category_id
+    """)
+
+
+def rebuild_search_index(conn: sqlite3.Connection) -> None:
+    """Rebuild the transaction and category full-text indexes from their tables."""
+    conn.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('delete-all')")
+    conn.execute("""
+        INSERT INTO transactions_fts (rowid, description, category)
+        SELECT id, description, 'c' || category_id FROM transactions
+    """)
+    conn.execute("INSERT INTO categories_fts (categories_fts) VALUES ('rebuild')")
+
+
+def rebuild_category_usage(conn: sqlite3.Connection) -> None:
+    """Recount the transactions of every category."""
+    conn.execute("UPDATE categories SET usage_count = (SELECT COUNT(*) FROM transactions WHERE category_id = categories.id)")
+
+
+def rebuild_month_versions(conn: sqlite3.Connection) -> None:
+    """Move every month version past the highest one, adding the months with transactions that have none.
+
+    Versions only need to change, not to be recomputed, so this makes the next snapshot refresh
+    rewrite (or drop) every partition.
+    """
+    conn.execute("""
+        INSERT INTO month_versions (month, version)
+        SELECT DISTINCT substr(date, 1, 7), 0 FROM transactions WHERE true
+        ON CONFLICT (month) DO NOTHING
+    """)
+    conn.execute("UPDATE month_versions SET version = version + 1 + (SELECT MAX(version) FROM month_versions)")
+
+
+def fold_bulk_inserts(conn: sqlite3.Connection, after_id: int) -> None:
+    """Apply the transactions with ids above ``after_id``, inserted with ledger_state.bulk set, to
+    everything the insert triggers maintain.
+
+    Each table gets one set-based statement over the new rows instead of one trigger run per row;
+    only the balance checkpoints are recomputed, from the monthly rollup (one row per month).
+    """
+    conn.execute("""
+        INSERT INTO daily_totals (day, category_id, total_cents, count)
+        SELECT date, category_id, SUM(amount_cents), COUNT(*) FROM transactions WHERE id > ? GROUP BY date, category_id
+        ON CONFLICT (day, category_id) DO UPDATE SET total_cents = total_cents + excluded.total_cents,
+                                                     count = count + excluded.count
+    """, (after_id,))
+    conn.execute("""
+        INSERT INTO monthly_totals (month, category_id, total_cents, count)
+        SELECT substr(date, 1, 7), category_id, SUM(amount_cents), COUNT(*) FROM transactions WHERE id > ?
+        GROUP BY substr(date, 1, 7), category_id
+        ON CONFLICT (month, category_id) DO UPDATE SET total_cents = total_cents + excluded.total_cents,
+                                                       count = count + excluded.count
+    """, (after_id,))
+    rebuild_balance_checkpoints(conn)
+    conn.execute("""
+        INSERT INTO transactions_fts (rowid, description, category)
+        SELECT id, description, 'c' || category_id FROM transactions WHERE id > ?
+    """, (after_id,))
+    conn.execute("""
+        UPDATE categories SET usage_count = usage_count + counts.added
+        FROM (SELECT category_id, COUNT(*) AS added FROM transactions WHERE id > ? GROUP BY category_id) AS counts
+        WHERE categories.id = counts.category_id
+    """, (after_id,))
+    conn.execute("""
+        INSERT INTO month_versions (month, version)
+        SELECT DISTINCT substr(date, 1, 7), 1 FROM transactions WHERE id > ?
+        ON CONFLICT (month) DO UPDATE SET version = version + 1
+    """, (after_id,))
+    conn.execute("UPDATE ledger_state SET version = version + 1")
+
+
+def rebuild_rollups_v10(conn: sqlite3.Connection) -> None:
+    """Recompute the category-id keyed rollup tables of schema version 10."""
+    conn.execute("DELETE FROM daily_totals")
+    conn.execute("DELETE FROM monthly_totals")
+    conn.execute("""
+        INSERT INTO daily_totals (day, category_id, total_cents, count)
+        SELECT date, category_id, SUM(amount_cents), COUNT(*) FROM transactions GROUP BY date, category_id
+    """)
+    conn.execute("""
+        INSERT INTO monthly_totals (month, category_id, total_cents, count)
+        SELECT substr(day, 1, 7), category_id, SUM(total_cents), SUM(count) FROM daily_totals
+        GROUP BY substr(day, 1, 7), category_id
+    """)
+
+
+def rebuild_search_index_v10(conn: sqlite3.Connection) -> None:
+    """Rebuild the contentless transaction index and the category index of schema version 10."""
+    conn.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('delete-all')")
+    conn.execute("""
+        INSERT INTO transactions_fts (rowid, description, category)
+        SELECT id, description, 'c' || category_id FROM transactions
+    """)
+    conn.execute("INSERT INTO categories_fts (categories_fts) VALUES ('rebuild')")
+
+
+def normalize_categories(conn: sqlite3.Connection) -> None:
+    """Move category names into a categories table and key transactions, rollups and search on its ids.
+
+    Transactions reference their category by integer id, the rollups group on it, and each
+    category keeps a usage count maintained by triggers. A rename is a single-row update: the
+    search index stores a per-id token in its category column and matches names through the
+    small categories_fts index.
+    """
+    conn.execute("""
+        CREATE TABLE categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            usage_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        INSERT INTO categories (name, usage_count)
+        SELECT category, COUNT(*) FROM transactions GROUP BY category ORDER BY category
+    """)
+
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'").fetchone()
+    sequence = row[0] if row else 0
+    conn.execute("""
+        CREATE TABLE transactions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            category_id INTEGER NOT NULL REFERENCES categories (id),
+            description TEXT NOT NULL,
+            amount_cents INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""
+        INSERT INTO transactions_new (id, date, category_id, description, amount_cents)
+        SELECT transactions.id, date, categories.id, description, amount_cents
+        FROM transactions JOIN categories ON categories.name = transactions.category
+    """)
+    # Dropping the table also drops its indexes and triggers; they are recreated below.
+    conn.execute("DROP TABLE transactions")
+    conn.execute("ALTER TABLE transactions_new RENAME TO transactions")
+    conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'transactions'", (sequence,))
+    conn.execute("CREATE INDEX idx_transactions_dedup ON transactions (date, amount_cents, description)")
+    conn.execute("CREATE INDEX idx_transactions_date ON transactions (date)")
+    conn.execute("CREATE INDEX idx_transactions_category ON transactions (category_id, date)")
+
+    conn.execute("DROP TABLE daily_totals")
+    conn.execute("DROP TABLE monthly_totals")
+    conn.execute("""
+        CREATE TABLE daily_totals (
+            day TEXT NOT NULL,
+            category_id INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, category_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE monthly_totals (
+            month TEXT NOT NULL,
+            category_id INTEGER NOT NULL,
+            total_cents INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (month, category_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX idx_monthly_totals_category ON monthly_totals (category_id, total_cents)")
+
+    # The search index can no longer read the category text from transactions, so it becomes
+    # contentless and is fed by the triggers.
+    conn.execute("DROP TABLE transactions_fts")
+    conn.execute("""
+        CREATE VIRTUAL TABLE transactions_fts USING fts5(
+            description, category,
+            content = '', tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+    """)
+    conn.execute("""
+        CREATE VIRTUAL TABLE categories_fts USING fts5(
+            name, content = 'categories', content_rowid = 'id', tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+    for trigger in (ROLLUP_TRIGGERS_V10 + DATA_VERSION_TRIGGERS_V5 + SEARCH_TRIGGERS_V10 + BALANCE_TRIGGERS_V8
+                    + MONTH_VERSION_TRIGGERS_V9 + CATEGORY_USAGE_TRIGGERS_V10 + CATEGORY_TRIGGERS_V10):
+        conn.execute(trigger)
+    rebuild_rollups_v10(conn)
+    rebuild_search_index_v10(conn)
+    conn.execute("ANALYZE")
+
+
+# Forecasts project the recurring rules, so caches keyed on the ledger data version (such as the
+# rendered summary charts) must also see writes to the rules.
+RULE_VERSION_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_recurring_rules_version_insert
+    AFTER INSERT ON recurring_rules
+    BEGIN
+        UPDATE ledger_state SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_recurring_rules_version_delete
+    AFTER DELETE ON recurring_rules
+    BEGIN
+        UPDATE ledger_state SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_recurring_rules_version_update
+    AFTER UPDATE ON recurring_rules
+    BEGIN
+        UPDATE ledger_state SET version = version + 1;
+    END
+    """,
+]
+
+
+def add_recurring_rules(conn: sqlite3.Connection) -> None:
+    """Add recurring transaction rules and tag the transactions materialized from them.
+
+    ``next_occurrence`` and ``next_date`` record how far each rule has been materialized, so a
+    repeated run only looks at rules with occurrences due. The unique (rule_id, occurrence) index
+    makes materializing the same occurrence twice a no-op. Rule ids are never reused, so the
+    transactions of a deleted rule can keep its id.
+    """
+    conn.execute("""
+        CREATE TABLE recurring_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category_id INTEGER NOT NULL REFERENCES categories (id),
+            description TEXT NOT NULL,
+            amount_cents INTEGER NOT NULL,
+            frequency TEXT NOT NULL CHECK (frequency IN ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')),
+            interval INTEGER NOT NULL CHECK (interval > 0),
+            start_date TEXT NOT NULL,
+            end_date TEXT,
+            next_occurrence INTEGER NOT NULL DEFAULT 0,
+            next_date TEXT
+        )
+    """)
+    conn.execute("ALTER TABLE transactions ADD COLUMN rule_id INTEGER REFERENCES recurring_rules (id)")
+    conn.execute("ALTER TABLE transactions ADD COLUMN occurrence INTEGER")
+    conn.execute("""
+        CREATE UNIQUE INDEX idx_transactions_rule_occurrence
+        ON transactions (rule_id, occurrence) WHERE rule_id IS NOT NULL
+    """)
+    for trigger in RULE_VERSION_TRIGGERS:
+        conn.execute(trigger)
+
+
+def add_bulk_import_mode(conn: sqlite3.Connection) -> None:
+    """Add ledger_state.bulk and recreate the insert triggers on transactions to skip rows written while it is set."""
+    conn.execute("ALTER TABLE ledger_state ADD COLUMN bulk INTEGER NOT NULL DEFAULT 0")
+    for name in ("rollup", "version", "search", "balance", "month_version", "category_usage"):
+        conn.execute(f"DROP TRIGGER trg_transactions_{name}_insert")
+    for triggers in (ROLLUP_TRIGGERS, DATA_VERSION_TRIGGERS, SEARCH_TRIGGERS, BALANCE_TRIGGERS,
+                     MONTH_VERSION_TRIGGERS, CATEGORY_USAGE_TRIGGERS):
+        conn.execute(triggers[0])
+
+
+MIGRATIONS: List[Migration] = [
+    (1, "create transactions table", create_transactions_table),
+    (2, "add date and category indexes", add_query_indexes),
+    (3, "add daily and monthly rollup tables", add_rollup_tables),
+    (4, "add keyset pagination indexes", add_keyset_indexes),
+    (5, "add ledger data version", add_data_version),
+    (6, "store amounts as integer cents", store_amounts_as_cents),
+    (7, "add full-text search index", add_search_index),
+    (8, "add monthly balance checkpoints", add_balance_checkpoints),
+    (9, "add per-month versions", add_month_versions),
+    (10, "normalize categories into a dimension table", normalize_categories),
+    (11, "add recurring transaction rules", add_recurring_rules),
+    (12, "add bulk import mode", add_bulk_import_mode),
+]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version stored in the database header."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> int:
+    """Apply pending migrations in order, each in its own transaction, and return the new version.
+
+    Each migration takes the write lock up front (BEGIN IMMEDIATE) and re-reads the version under
+    it, so when several processes open an old database at once, only the first one applies a
+    migration and the others skip it.
+    """
+    version = schema_version(conn)
+    for target, description, apply in migrations:
+        if target <= version:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            version = schema_version(conn)
+            if target <= version:
+                conn.commit()
+                continue
+            apply(conn)
+            conn.execute(f"PRAGMA user_version = {target:d}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = target
+    return version
+
+
+def explain_query_plan(conn: sqlite3.Connection, query: str, params: Sequence = ()) -> List[str]:
+    """Return the detail lines of EXPLAIN QUERY PLAN for a query."""
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+
+
+def uses_index(plan: List[str], table: str = "transactions") -> bool:
+    """Return True if no step of the plan reads the table without an index."""
+    steps = [step for step in plan if step.split()[1:2] == [table]]
+    return all("INDEX" in step or "PRIMARY KEY" in step for step in steps)
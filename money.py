@@ -0,0 +1,25 @@
+"""Conversions between user-facing amounts and the integer cents stored in the database."""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Union
+
+CENTS = 100
+
+
+def to_cents(amount: Union[str, int, float, Decimal]) -> int:
+    """Convert an amount such as ``-12.5``, ``"1234.56"`` or ``Decimal("0.285")`` to integer cents.
+
+    Floats are converted through their shortest repr, so ``0.285`` becomes 29 cents rather than
+    the 28 that ``round(0.285 * 100)`` gives. Halves are rounded away from zero.
+    """
+    try:
+        value = amount if isinstance(amount, Decimal) else Decimal(str(amount).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {amount!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"Invalid amount: {amount!r}")
+    return int((value * CENTS).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> float:
+    """Convert integer cents to a float amount for display."""
+    return cents / CENTS
@@ -0,0 +1,262 @@
+"""Opt-in instrumentation of a BudgetTracker: timing spans per method and per SQL statement.
+
+A Profiler hooks into the tracker's connection in three ways:
+
+- a Connection/Cursor factory times every statement from execute to its last fetch and counts
+  the rows it returned;
+- a progress handler counts SQLite virtual machine steps, attributed to the running statement;
+- a trace callback records every statement SQLite runs, including implicit BEGIN/COMMIT and the
+  statements run by triggers.
+
+Public tracker methods (plus the ``view_summary`` phases in ``PHASES``) are wrapped in spans.
+Each span reports wall time, the part of it spent in SQL and the Python-side remainder (pandas,
+NumPy, matplotlib, formatting). Nested spans are reported under their path, e.g.
+``view_summary > _summary_data > get_category_totals``.
+"""
+import functools
+import inspect
+import json
+import os
+import platform
+import sqlite3
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO
+
+PROFILE_ENV = "BUDGET_TRACKER_PROFILE"
+PROFILE_JSON_ENV = "BUDGET_TRACKER_PROFILE_JSON"
+PROGRESS_STEPS = 1000
+PHASES = ("_summary_data", "_summary_forecasts", "_plot_summary")
+SQL_WIDTH = 70
+OPERATION_WIDTH = 60
+
+
+class StatementStats:
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.calls = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.vm_steps = 0
+
+
+class SpanStats:
+    def __init__(self, path: str):
+        self.path = path
+        self.calls = 0
+        self.wall = 0.0
+        self.sql = 0.0
+        self.rows = 0
+        self.statements = 0
+
+
+class _Frame:
+    def __init__(self, path: str):
+        self.path = path
+        self.started = time.perf_counter()
+        self.sql = 0.0
+        self.rows = 0
+        self.statements = 0
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that reports the time and rows of each statement to the connection's profiler."""
+
+    profiler: "Profiler"
+
+    def execute(self, sql: str, parameters: Any = ()) -> "ProfiledCursor":
+        self._stats = self.profiler.statement(sql)
+        with self.profiler.timed(self._stats):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "ProfiledCursor":
+        self._stats = self.profiler.statement(sql)
+        with self.profiler.timed(self._stats):
+            return super().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str) -> "ProfiledCursor":
+        self._stats = self.profiler.statement(sql_script)
+        with self.profiler.timed(self._stats):
+            return super().executescript(sql_script)
+
+    def fetchone(self) -> Any:
+        with self.profiler.timed(self._stats, calls=0):
+            row = super().fetchone()
+        self.profiler.add_rows(self._stats, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        with self.profiler.timed(self._stats, calls=0):
+            rows = super().fetchmany(self.arraysize if size is None else size)
+        self.profiler.add_rows(self._stats, len(rows))
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        with self.profiler.timed(self._stats, calls=0):
+            rows = super().fetchall()
+        self.profiler.add_rows(self._stats, len(rows))
+        return rows
+
+    def __next__(self) -> Any:
+        with self.profiler.timed(self._stats, calls=0):
+            row = super().__next__()
+        self.profiler.add_rows(self._stats, 1)
+        return row
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose shortcut execute methods go through ProfiledCursor."""
+
+    cursor_class: type
+
+    def cursor(self, factory: Optional[Callable] = None) -> sqlite3.Cursor:
+        return super().cursor(factory or self.cursor_class)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str) -> sqlite3.Cursor:
+        return self.cursor().executescript(sql_script)
+
+
+class Profiler:
+    """Collects per-method spans and per-statement SQL statistics for one tracker."""
+
+    def __init__(self):
+        self.statements: Dict[str, StatementStats] = {}
+        self.spans: Dict[str, SpanStats] = {}
+        self.traced: Counter = Counter()
+        self.stack: List[_Frame] = []
+        self.active: Optional[StatementStats] = None
+        cursor_class = type("TrackerProfiledCursor", (ProfiledCursor,), {"profiler": self})
+        self.connection_factory = type("TrackerProfiledConnection", (ProfiledConnection,), {"cursor_class": cursor_class})
+
+    @classmethod
+    def from_env(cls) -> Optional["Profiler"]:
+        """Return a Profiler if BUDGET_TRACKER_PROFILE or BUDGET_TRACKER_PROFILE_JSON is set."""
+        return cls() if os.environ.get(PROFILE_ENV) or os.environ.get(PROFILE_JSON_ENV) else None
+
+    def attach(self, tracker: Any) -> None:
+        """Install the trace and progress callbacks and wrap the tracker's methods in spans."""
+        tracker.conn.set_trace_callback(self._trace)
+        tracker.conn.set_progress_handler(self._progress, PROGRESS_STEPS)
+        for name, _ in inspect.getmembers(type(tracker), inspect.isfunction):
+            if not name.startswith("_") or name in PHASES:
+                setattr(tracker, name, self.wrap(name, getattr(tracker, name)))
+
+    def wrap(self, name: str, method: Callable) -> Callable:
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def generator(*args, **kwargs):
+                with self.span(name):
+                    yield from method(*args, **kwargs)
+            return generator
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with self.span(name):
+                return method(*args, **kwargs)
+        return wrapper
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the block as an operation nested under the spans that are open."""
+        path = f"{self.stack[-1].path} > {name}" if self.stack else name
+        frame = _Frame(path)
+        self.stack.append(frame)
+        try:
+            yield
+        finally:
+            self.stack.remove(frame)
+            span = self.spans.get(path)
+            if span is None:
+                span = self.spans[path] = SpanStats(path)
+            span.calls += 1
+            span.wall += time.perf_counter() - frame.started
+            span.sql += frame.sql
+            span.rows += frame.rows
+            span.statements += frame.statements
+
+    def statement(self, sql: str) -> StatementStats:
+        key = " ".join(sql.split())
+        stats = self.statements.get(key)
+        if stats is None:
+            stats = self.statements[key] = StatementStats(key)
+        return stats
+
+    @contextmanager
+    def timed(self, stats: StatementStats, calls: int = 1) -> Iterator[None]:
+        """Charge the time of the block (an execute or a fetch) to a statement and the open spans."""
+        previous, self.active = self.active, stats
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.active = previous
+            stats.calls += calls
+            stats.seconds += seconds
+            for frame in self.stack:
+                frame.sql += seconds
+                frame.statements += calls
+
+    def add_rows(self, stats: StatementStats, rows: int) -> None:
+        stats.rows += rows
+        for frame in self.stack:
+            frame.rows += rows
+
+    def _trace(self, sql: str) -> None:
+        self.traced[" ".join(sql.split())] += 1
+
+    def _progress(self) -> int:
+        if self.active is not None:
+            self.active.vm_steps += PROGRESS_STEPS
+        return 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the collected statistics as JSON-serializable data (times in milliseconds)."""
+        return {
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "argv": sys.argv,
+            },
+            "operations": [
+                {"operation": span.path, "calls": span.calls, "wall_ms": span.wall * 1000, "sql_ms": span.sql * 1000,
+                 "python_ms": max(span.wall - span.sql, 0.0) * 1000, "statements": span.statements, "rows": span.rows}
+                for span in sorted(self.spans.values(), key=lambda span: span.path)
+            ],
+            "statements": [
+                {"sql": stats.sql, "calls": stats.calls, "rows": stats.rows, "ms": stats.seconds * 1000,
+                 "vm_steps": stats.vm_steps}
+                for stats in sorted(self.statements.values(), key=lambda stats: stats.seconds, reverse=True)
+            ],
+            "traced": [{"sql": sql, "count": count} for sql, count in self.traced.most_common()],
+        }
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def report(self, stream: TextIO = sys.stderr, top: int = 15) -> None:
+        """Print the per-operation breakdown and the most expensive statements."""
+        data = self.to_dict()
+        stream.write("\nProfile by Operation:\n")
+        stream.write(f"{'operation':<{OPERATION_WIDTH}} {'calls':>6} {'wall ms':>10} {'sql ms':>10} {'python ms':>10} {'rows':>9}\n")
+        for op in data["operations"]:
+            name = op["operation"] if len(op["operation"]) <= OPERATION_WIDTH else "..." + op["operation"][3 - OPERATION_WIDTH:]
+            stream.write(f"{name:<{OPERATION_WIDTH}} {op['calls']:>6} {op['wall_ms']:>10.3f} {op['sql_ms']:>10.3f} "
+                         f"{op['python_ms']:>10.3f} {op['rows']:>9}\n")
+        stream.write(f"\nTop SQL Statements ({len(data['statements'])} distinct, "
+                     f"{sum(self.traced.values())} traced incl. triggers):\n")
+        stream.write(f"{'sql':<{SQL_WIDTH}} {'calls':>6} {'ms':>10} {'rows':>9} {'vm steps':>10}\n")
+        for stmt in data["statements"][:top]:
+            sql = stmt["sql"] if len(stmt["sql"]) <= SQL_WIDTH else stmt["sql"][:SQL_WIDTH - 3] + "..."
+            stream.write(f"{sql:<{SQL_WIDTH}} {stmt['calls']:>6} {stmt['ms']:>10.3f} {stmt['rows']:>9} {stmt['vm_steps']:>10}\n")
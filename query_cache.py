@@ -0,0 +1,84 @@
+"""Memoization of BudgetTracker read methods, invalidated by database changes.
+
+Results are kept in a bounded LRU keyed on the method and its arguments. Before every lookup the
+cache compares a change token with the one its entries were computed under and drops them all
+if it moved. The token combines:
+
+- ``PRAGMA data_version``, which changes when another connection (another process, the server,
+  a second tracker) commits to the database;
+- ``Connection.total_changes``, which grows with every row this connection writes, including
+  writes not committed yet inside a batch.
+"""
+import functools
+import sqlite3
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Tuple
+
+DEFAULT_CACHE_SIZE = 256
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    invalidations: int
+    maxsize: int
+    currsize: int
+
+
+class QueryCache:
+    """Bounded LRU of query results for one connection."""
+
+    def __init__(self, conn: sqlite3.Connection, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.conn = conn
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.token: Tuple[int, int] = (-1, -1)
+        self.hits = self.misses = self.invalidations = 0
+
+    def change_token(self) -> Tuple[int, int]:
+        return self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for ``key``, computing and storing it on a miss."""
+        token = self.change_token()
+        if token != self.token:
+            if self.entries:
+                self.invalidations += 1
+                self.entries.clear()
+            self.token = token
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        value = compute()
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.invalidations, self.maxsize, len(self.entries))
+
+
+def cached_query(method: Callable) -> Callable:
+    """Memoize a read method in the tracker's ``query_cache`` (if any).
+
+    Cached lists are handed out as copies, so callers can never alter what later calls receive.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.query_cache
+        if cache is None:
+            return method(self, *args, **kwargs)
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        value = cache.get(key, lambda: method(self, *args, **kwargs))
+        return list(value) if isinstance(value, list) else value
+    return wrapper
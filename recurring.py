@@ -0,0 +1,106 @@
+"""Recurring transaction rules (rent, salaries, subscriptions) and their schedules.
+
+A rule repeats an amount every ``interval`` days, weeks, months or years from its start date,
+optionally until an end date. Periods are written RRULE-style (``FREQ=MONTHLY;INTERVAL=2``) or
+with a name from ``PERIODS`` (``monthly``, ``quarterly``, ...). Occurrence ``n`` is always
+computed from the start date, so monthly rules starting on the 31st fall on the last day of
+shorter months without drifting to the 28th afterwards.
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+PERIODS = {
+    "daily": ("DAILY", 1),
+    "weekly": ("WEEKLY", 1),
+    "biweekly": ("WEEKLY", 2),
+    "monthly": ("MONTHLY", 1),
+    "quarterly": ("MONTHLY", 3),
+    "yearly": ("YEARLY", 1),
+}
+UNITS = {"DAILY": "day", "WEEKLY": "week", "MONTHLY": "month", "YEARLY": "year"}
+
+
+class RecurringRule(NamedTuple):
+    id: int
+    category: str
+    description: str
+    amount_cents: int
+    frequency: str
+    interval: int
+    start_date: str
+    end_date: Optional[str]
+    next_occurrence: int
+    next_date: Optional[str]
+
+
+def parse_period(text: str) -> Tuple[str, int]:
+    """Parse ``monthly`` or ``FREQ=MONTHLY;INTERVAL=2`` into a (frequency, interval) pair."""
+    if text.lower() in PERIODS:
+        return PERIODS[text.lower()]
+    parts = {}
+    for part in text.upper().split(";"):
+        key, _, value = part.partition("=")
+        parts[key.strip()] = value.strip()
+    frequency = parts.pop("FREQ", None)
+    interval = parts.pop("INTERVAL", "1")
+    if frequency not in FREQUENCIES or parts or not interval.isdigit() or int(interval) < 1:
+        raise ValueError(f"Unsupported period {text!r}: use one of {', '.join(PERIODS)} "
+                         f"or FREQ={'|'.join(FREQUENCIES)};INTERVAL=N")
+    return frequency, int(interval)
+
+
+def parse_date(text: str, name: str = "date") -> date:
+    """Parse a strict YYYY-MM-DD date, raising ValueError for anything else (e.g. ``2024-1-5``)."""
+    try:
+        day = date.fromisoformat(text)
+    except (TypeError, ValueError):
+        day = None
+    if day is None or day.isoformat() != text:
+        raise ValueError(f"Invalid {name} {text!r}, expected YYYY-MM-DD")
+    return day
+
+
+def describe_period(frequency: str, interval: int) -> str:
+    """Return the name of a period (``monthly``) or ``every 2 months``."""
+    for name, period in PERIODS.items():
+        if period == (frequency, interval):
+            return name
+    return f"every {interval} {UNITS[frequency]}{'s' if interval > 1 else ''}"
+
+
+def add_months(day: date, months: int) -> date:
+    """Shift a date by whole months, clamping the day to the length of the target month."""
+    year, month = divmod(day.month - 1 + months, 12)
+    year, month = day.year + year, month + 1
+    return date(year, month, min(day.day, monthrange(year, month)[1]))
+
+
+def occurrence_date(rule: RecurringRule, occurrence: int) -> date:
+    """Return the date of the ``occurrence``-th repetition of a rule (0 is the start date)."""
+    start = date.fromisoformat(rule.start_date)
+    steps = occurrence * rule.interval
+    if rule.frequency == "DAILY":
+        return start + timedelta(days=steps)
+    if rule.frequency == "WEEKLY":
+        return start + timedelta(weeks=steps)
+    return add_months(start, steps * (12 if rule.frequency == "YEARLY" else 1))
+
+
+def due_date(rule: RecurringRule, occurrence: int) -> Optional[str]:
+    """Return the date of an occurrence, or None if it falls after the rule's end date."""
+    day = occurrence_date(rule, occurrence).isoformat()
+    return None if rule.end_date and day > rule.end_date else day
+
+
+def iter_occurrences(rule: RecurringRule, until: str, first: int = 0) -> Iterator[Tuple[int, str]]:
+    """Yield (occurrence, YYYY-MM-DD date) pairs from occurrence ``first`` up to ``until`` and the rule's end date."""
+    last = min(until, rule.end_date) if rule.end_date else until
+    occurrence = first
+    while True:
+        day = occurrence_date(rule, occurrence).isoformat()
+        if day > last:
+            return
+        yield occurrence, day
+        occurrence += 1
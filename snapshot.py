@@ -0,0 +1,216 @@
+"""Columnar, month-partitioned snapshots of the ledger for analytics outside SQLite.
+
+A snapshot is a directory with one partition per month and a ``manifest.json``:
+
+    snapshot/
+        manifest.json            format, per-month versions and row counts, category names by id
+        month=2024-01/           npy: id.npy, day.npy, category.npy, description.npy, cents.npy,
+                                 descriptions.json
+        month=2024-02/           parquet: part.parquet with the same columns
+        ...
+
+Columns follow LedgerArrays: int64 ids, int32 day numbers, int32 category ids, int32 description
+codes and int64 cents. Category names are rewritten into the manifest on every export, so a
+renamed category needs no partition rewrite. Description codes index a dictionary of the
+partition's own descriptions (``descriptions.json``, or the Parquet column's native dictionary),
+so a refresh writes and a load reads only the dictionaries of the partitions involved. ``npy``
+partitions are memory-mapped by ``load_snapshot``, so reports read them without parsing;
+``parquet`` needs the optional ``pyarrow`` package.
+
+Every write to a transaction bumps the version of its month in the ``month_versions`` table, so
+a refresh rewrites only the partitions whose version changed since the last export.
+"""
+import json
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ledger import LedgerArrays
+
+SNAPSHOT_FORMATS = ("npy", "parquet")
+MANIFEST = "manifest.json"
+COLUMNS = ("id", "day", "category", "description", "cents")
+# Bumped when the meaning of the stored columns changes; older snapshots are rewritten in full.
+LAYOUT = 3
+
+
+def partition_dir(path: str, month: str) -> str:
+    return os.path.join(path, f"month={month}")
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(path: str, manifest: Dict[str, Any]) -> None:
+    manifest_path = os.path.join(path, MANIFEST)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def _write_npy(directory: str, columns: Dict[str, np.ndarray], descriptions: List[str]) -> None:
+    for name in COLUMNS:
+        np.save(os.path.join(directory, f"{name}.npy"), columns[name])
+    with open(os.path.join(directory, "descriptions.json"), "w", encoding="utf-8") as f:
+        json.dump(descriptions, f)
+
+
+def _write_parquet(directory: str, columns: Dict[str, np.ndarray], descriptions: List[str]) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table({
+        "id": pa.array(columns["id"]),
+        "day": pa.array(columns["day"]).cast(pa.date32()),
+        "category": pa.array(columns["category"]),
+        "description": pa.DictionaryArray.from_arrays(pa.array(columns["description"]), pa.array(descriptions)),
+        "cents": pa.array(columns["cents"]),
+    })
+    pq.write_table(table, os.path.join(directory, "part.parquet"))
+
+
+def export_snapshot(conn: sqlite3.Connection, path: str, format: str = "npy", full: bool = False) -> Tuple[int, int, int]:
+    """Write or refresh a month-partitioned snapshot of the transactions under ``path``.
+
+    Only months whose version changed since the snapshot was written are exported again, unless
+    ``full`` is set or the snapshot has another format. Run it inside a transaction (as
+    ``BudgetTracker.export_snapshot`` does) for a consistent snapshot while other connections
+    write. Returns the number of partitions rewritten, removed and left unchanged.
+    """
+    if format not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Unsupported snapshot format: {format}")
+    if format == "parquet":
+        # Imported up front so that a missing pyarrow fails before any partition is removed.
+        import pyarrow.parquet
+    manifest = read_manifest(path)
+    if full or manifest is None or manifest["format"] != format or manifest.get("layout") != LAYOUT:
+        if manifest is not None:
+            for month in manifest["months"]:
+                shutil.rmtree(partition_dir(path, month), ignore_errors=True)
+        manifest = {"format": format, "layout": LAYOUT, "months": {}, "categories": []}
+    os.makedirs(path, exist_ok=True)
+    category_ids = dict(conn.execute("SELECT name, id FROM categories"))
+    categories = [""] * (max(category_ids.values(), default=0) + 1)
+    for name, category_id in category_ids.items():
+        categories[category_id] = name
+    manifest["categories"] = categories
+    written = removed = 0
+
+    versions = dict(conn.execute("SELECT month, version FROM month_versions"))
+    changed = [month for month, version in sorted(versions.items())
+               if manifest["months"].get(month, {}).get("version") != version]
+    for month in changed:
+        ledger = LedgerArrays.from_connection(conn, f"{month}-01", f"{month}-31")
+        directory = partition_dir(path, month)
+        shutil.rmtree(directory, ignore_errors=True)
+        if not len(ledger):
+            if manifest["months"].pop(month, None) is not None:
+                removed += 1
+            continue
+        columns = {
+            "id": ledger.ids,
+            "day": ledger.days,
+            "category": np.array([category_ids[name] for name in ledger.categories], dtype=np.int32)[ledger.category_codes],
+            "description": ledger.description_codes,
+            "cents": ledger.cents,
+        }
+        os.makedirs(directory + ".tmp", exist_ok=True)
+        if format == "npy":
+            _write_npy(directory + ".tmp", columns, ledger.descriptions)
+        else:
+            _write_parquet(directory + ".tmp", columns, ledger.descriptions)
+        os.replace(directory + ".tmp", directory)
+        manifest["months"][month] = {"version": versions[month], "rows": len(ledger)}
+        written += 1
+    for month in set(manifest["months"]) - set(versions):
+        shutil.rmtree(partition_dir(path, month), ignore_errors=True)
+        del manifest["months"][month]
+        removed += 1
+    manifest["data_version"] = conn.execute("SELECT version FROM ledger_state").fetchone()[0]
+    manifest["created"] = datetime.now().isoformat(timespec="seconds")
+    _write_manifest(path, manifest)
+    return written, removed, len(manifest["months"]) - written
+
+
+class Snapshot:
+    """Read-only view of a snapshot directory; npy partitions are memory-mapped, not loaded."""
+
+    def __init__(self, path: str):
+        manifest = read_manifest(path)
+        if manifest is None:
+            raise FileNotFoundError(f"No snapshot manifest in {path}")
+        self.path = path
+        self.format = manifest["format"]
+        self.months = sorted(manifest["months"])
+        self.rows = sum(partition["rows"] for partition in manifest["months"].values())
+        # Indexed by category id; ids without a category (deleted or merged away) hold "".
+        self.categories: List[str] = manifest["categories"]
+        self.data_version: Optional[int] = manifest.get("data_version")
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def partition(self, month: str) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        """Return the columns of one month and the descriptions its description codes index.
+
+        For npy snapshots the columns are zero-copy memory maps.
+        """
+        directory = partition_dir(self.path, month)
+        if self.format == "npy":
+            with open(os.path.join(directory, "descriptions.json"), encoding="utf-8") as f:
+                descriptions = json.load(f)
+            return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}, descriptions
+        return self._read_parquet(directory)
+
+    def _read_parquet(self, directory: str) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(os.path.join(directory, "part.parquet"), memory_map=True)
+        columns = {
+            "id": table.column("id").to_numpy(),
+            "day": table.column("day").cast(pa.int32()).to_numpy(),
+            "category": table.column("category").to_numpy(),
+            "cents": table.column("cents").to_numpy(),
+        }
+        # Chunks may carry their own dictionaries; map them onto one dictionary for the partition.
+        index: Dict[str, int] = {}
+        codes = [np.array([index.setdefault(value, len(index)) for value in chunk.dictionary.to_pylist()], dtype=np.int32)[
+                     chunk.indices.to_numpy(zero_copy_only=False)] for chunk in table.column("description").chunks]
+        columns["description"] = np.concatenate(codes) if codes else np.empty(0, dtype=np.int32)
+        return columns, list(index)
+
+    def ledger(self, start_month: Optional[str] = None, end_month: Optional[str] = None) -> LedgerArrays:
+        """Return the months in the optional range as LedgerArrays, for forecasting and reports.
+
+        The selected partitions are concatenated, so this copies them into memory once. As with
+        ``LedgerArrays.from_connection``, the categories and descriptions are those of the rows read.
+        """
+        months = [month for month in self.months
+                  if (not start_month or month >= start_month) and (not end_month or month <= end_month)]
+        parts = []
+        descriptions: Dict[str, int] = {}
+        for month in months:
+            part, names = self.partition(month)
+            mapping = np.array([descriptions.setdefault(name, len(descriptions)) for name in names], dtype=np.int32)
+            parts.append(dict(part, description=mapping[part["description"]] if len(names) else part["description"]))
+        columns = {name: np.concatenate([part[name] for part in parts]) if parts else np.empty(0, dtype=dtype)
+                   for name, dtype in zip(COLUMNS, (np.int64, np.int32, np.int32, np.int32, np.int64))}
+        category_ids, category_codes = np.unique(columns["category"], return_inverse=True)
+        return LedgerArrays(columns["id"], columns["day"], category_codes.astype(np.int32), columns["description"],
+                            columns["cents"], [self.categories[category_id] for category_id in category_ids.tolist()],
+                            list(descriptions))
+
+
+def load_snapshot(path: str) -> Snapshot:
+    """Open a snapshot written by ``export_snapshot`` without touching the database."""
+    return Snapshot(path)
@@ -1,12 +1,29 @@
 #!/home/fcurcio/anaconda3/envs/ML/bin/python3
 
 import argparse
-from BudgetTracker import BudgetTracker
+from BudgetTracker import BudgetTracker, OUTPUT_FORMATS, SEARCH_LIMIT, TRANSACTION_COLUMNS
+from contextlib import nullcontext
 from datetime import datetime, timedelta
+from itertools import islice
 import readline
 import atexit
+import json
+import os
+import shlex
+import sys
+from profiling import PROFILE_JSON_ENV, Profiler
 
 HIST_FILE = ".tracker_history"
+BATCH_SIZE = 500
+# Positional arguments of each plain-text batch command; JSON commands use the same field names.
+BATCH_FIELDS = {
+    "add": ("date", "category", "description", "amount"),
+    "modify": ("id", "date", "category", "description", "amount"),
+    "delete": ("id",),
+    "filter": ("category", "start_date", "end_date"),
+    "search": ("query",),
+    "balance": (),
+}
 
 def formatted_input(prompt: str, example: str = "", separator: str = "-") -> str:
     print(separator * 50)
@@ -25,20 +42,59 @@ def setup_readline():
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Budget Tracker CLI")
+    parser.add_argument("--db", default="budget_data.db", metavar='FILE', help="Database file (default: budget_data.db)")
     parser.add_argument("--add", nargs=4, metavar=('DATE', 'CATEGORY', 'DESCRIPTION', 'AMOUNT'), help="Add a transaction")
     parser.add_argument("--view", action='store_true', help="View summary")
+    parser.add_argument("--out", metavar='FILE', help="With --view, render the charts to a .png or .svg file instead of opening a window")
+    parser.add_argument("--forecast", type=int, metavar='DAYS', help="Forecast the balance DAYS ahead and list recurring transactions; with --view, plot the forecast")
     parser.add_argument("--balance", action='store_true', help="Calculate balance")
+    parser.add_argument("--balance-at", metavar='DATE', help="Show the balance at the end of DATE")
     parser.add_argument("--print", action='store_true', help="Print transactions")
     parser.add_argument("--delete", metavar='ID', type=int, help="Delete a transaction by ID")
     parser.add_argument("--modify", nargs=5, metavar=('ID', 'DATE', 'CATEGORY', 'DESCRIPTION', 'AMOUNT'), help="Modify a transaction")
     parser.add_argument("--filter", nargs=3, metavar=('CATEGORY', 'START_DATE', 'END_DATE'), help="Filter transactions by category and/or date range")
+    parser.add_argument("--search", metavar='QUERY', help="Full-text search of descriptions and categories, best match first")
+    parser.add_argument("--category", help="With --search, only show transactions of this category")
+    parser.add_argument("--start-date", metavar='DATE', help="With --search, only show transactions on or after DATE")
+    parser.add_argument("--end-date", metavar='DATE', help="With --search, only show transactions on or before DATE")
+    parser.add_argument("--limit", type=int, metavar='N', help="With --print/--filter/--search, show at most N transactions (--search default: 50)")
+    parser.add_argument("--after-id", type=int, metavar='ID', help="With --print/--filter, start right after transaction ID")
+    parser.add_argument("--output", choices=OUTPUT_FORMATS, default='table', help="With --print/--filter/--search, stream rows as a table, CSV or JSON lines")
+    parser.add_argument("--import", dest='import_file', metavar='FILE', help="Bulk import transactions from a CSV or OFX bank statement")
+    parser.add_argument("--import-format", choices=('csv', 'ofx'), help="Format of the --import file (default: guessed from the extension)")
+    parser.add_argument("--allow-duplicates", action='store_true', help="With --import, keep rows that match existing transactions")
+    parser.add_argument("--add-rule", nargs=5, metavar=('START_DATE', 'CATEGORY', 'DESCRIPTION', 'AMOUNT', 'PERIOD'), help="Add a recurring rule; PERIOD is daily/weekly/biweekly/monthly/quarterly/yearly or FREQ=MONTHLY;INTERVAL=N")
+    parser.add_argument("--rule-end", metavar='DATE', help="With --add-rule, last date the rule may occur on")
+    parser.add_argument("--rules", action='store_true', help="List the recurring rules")
+    parser.add_argument("--delete-rule", metavar='ID', type=int, help="Delete a recurring rule (transactions it created are kept)")
+    parser.add_argument("--materialize", nargs='?', const='today', metavar='UNTIL', help="Add every recurring rule occurrence due up to UNTIL (default: today); safe to rerun, e.g. from cron")
+    parser.add_argument("--rename-category", nargs=2, metavar=('OLD', 'NEW'), help="Rename a category, merging it into NEW if NEW already exists")
+    parser.add_argument("--export-snapshot", metavar='DIR', help="Write or refresh a month-partitioned columnar snapshot of the ledger in DIR")
+    parser.add_argument("--snapshot-format", choices=('npy', 'parquet'), default='npy', help="With --export-snapshot, memory-mappable NumPy files or Parquet (needs pyarrow)")
+    parser.add_argument("--full", action='store_true', help="With --export-snapshot, rewrite every partition instead of only the changed months")
+    parser.add_argument("--check-indexes", action='store_true', help="Show query plans and fail if a query method does not use an index")
+    parser.add_argument("--rebuild-aggregates", action='store_true', help="Recompute the rollup tables, balance checkpoints, category usage counts and search indexes, and bump the month versions")
+    parser.add_argument("--batch", metavar='FILE', help="Run add/modify/delete/filter/search/balance commands from FILE ('-' for stdin), one per line or as JSON lines")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, metavar='N', help=f"With --batch, commit every N commands (default: {BATCH_SIZE})")
+    parser.add_argument("--atomic", action='store_true', help="With --batch, roll back every command if any of them fails")
+    parser.add_argument("--profile", action='store_true', help="Print a per-operation breakdown of wall, SQL and Python time to stderr on exit")
+    parser.add_argument("--profile-json", metavar='FILE', help="Write the profile as JSON to FILE on exit (implies --profile)")
+    parser.add_argument("--serve", action='store_true', help="Serve the tracker as a local JSON service (WAL mode, pooled readers, batched writes)")
+    parser.add_argument("--host", default="127.0.0.1", help="With --serve, address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="With --serve, TCP port to listen on")
+    parser.add_argument("--socket", metavar='PATH', help="With --serve, listen on a Unix socket instead of TCP")
+    parser.add_argument("--readers", type=int, default=4, help="With --serve, number of pooled reader connections")
     return parser.parse_args()
 
 def handle_add(tracker, args):
     date, category, description, amount = args.add
     date = resolve_date(date)
     amount = float(amount)
-    tracker.add_transaction(date, category, description, amount)
+    try:
+        tracker.add_transaction(date, category, description, amount)
+    except ValueError as error:
+        print(error)
+        return
     print("Transaction added successfully!")
 
 def resolve_date(date_str):
@@ -54,14 +110,180 @@ def handle_modify(tracker, args):
     category = category if category != 'None' else None
     description = description if description != 'None' else None
     amount = float(amount) if amount != 'None' else None
-    tracker.modify_transaction(transaction_id, date, category, description, amount)
+    try:
+        report_modify(tracker.modify_transaction(int(transaction_id), date, category, description, amount), transaction_id)
+    except ValueError as error:
+        print(error)
+
+def report_modify(updated, transaction_id):
+    if updated:
+        print(f"Transaction with ID {transaction_id} updated successfully.")
+    else:
+        print(f"Transaction with ID {transaction_id} not found.")
+
+def handle_delete(tracker, transaction_id):
+    if tracker.delete_transaction(transaction_id):
+        print(f"Transaction with ID {transaction_id} deleted successfully.")
+    else:
+        print(f"Transaction with ID {transaction_id} not found.")
 
 def handle_filter(tracker, args):
     category, start_date, end_date = args.filter
     category = None if category == "None" else category
     start_date = None if start_date == "None" else start_date
     end_date = None if end_date == "None" else end_date
-    tracker.filter_transactions(category, start_date, end_date)
+    tracker.filter_transactions(category, start_date, end_date,
+                                limit=args.limit, after_id=args.after_id, output=args.output)
+
+def handle_add_rule(tracker, args):
+    start_date, category, description, amount, period = args.add_rule
+    end_date = resolve_date(args.rule_end) if args.rule_end else None
+    try:
+        rule_id = tracker.add_recurring_rule(resolve_date(start_date), category, description, float(amount), period, end_date)
+    except ValueError as error:
+        print(error)
+        return
+    print(f"Recurring rule {rule_id} added; run --materialize to add its due occurrences.")
+
+def handle_delete_rule(tracker, rule_id):
+    if tracker.delete_recurring_rule(rule_id):
+        print(f"Recurring rule {rule_id} deleted successfully.")
+    else:
+        print(f"Recurring rule {rule_id} not found.")
+
+def handle_rename_category(tracker, args):
+    old_name, new_name = args.rename_category
+    try:
+        tracker.rename_category(old_name, new_name)
+    except ValueError as error:
+        print(error)
+
+def handle_search(tracker, args):
+    limit = args.limit if args.limit is not None else SEARCH_LIMIT
+    tracker.print_search_results(args.search, args.category, resolve_date(args.start_date) if args.start_date else None,
+                                 resolve_date(args.end_date) if args.end_date else None, limit=limit, output=args.output)
+
+def handle_view(tracker, args):
+    if args.out:
+        cached = tracker.render_summary(args.out, future_days=args.forecast)
+        print(f"Summary written to {args.out}{' (cached)' if cached else ''}.")
+    else:
+        tracker.view_summary(future_days=args.forecast)
+
+def handle_import(tracker, args):
+    tracker.import_transactions(args.import_file, format=args.import_format,
+                                skip_duplicates=not args.allow_duplicates)
+
+class BatchAborted(Exception):
+    pass
+
+def parse_batch_command(line):
+    if line.startswith("{"):
+        command = json.loads(line)
+        if not isinstance(command, dict) or "op" not in command:
+            raise ValueError('expected a JSON object with an "op" field')
+        return command
+    words = shlex.split(line)
+    op, values = words[0].lower(), [None if word == "None" else word for word in words[1:]]
+    if op not in BATCH_FIELDS:
+        raise ValueError(f"unknown command {op!r}")
+    fields = BATCH_FIELDS[op]
+    if len(values) != len(fields):
+        raise ValueError(f"{op} expects {len(fields)} arguments: {' '.join(fields).upper()}")
+    return dict(zip(fields, values), op=op)
+
+def execute_batch_command(tracker, command):
+    op = command["op"]
+    optional_date = lambda field: resolve_date(command[field]) if command.get(field) else None
+    if op == "add":
+        transaction_id = tracker.add_transaction(resolve_date(command["date"]), command["category"],
+                                                 command.get("description") or "", float(command["amount"]))
+        return {"id": transaction_id}
+    if op == "modify":
+        transaction_id = int(command["id"])
+        amount = float(command["amount"]) if command.get("amount") is not None else None
+        if not tracker.modify_transaction(transaction_id, optional_date("date"), command.get("category"),
+                                          command.get("description"), amount):
+            raise LookupError(f"Transaction with ID {transaction_id} not found.")
+        return {"id": transaction_id}
+    if op == "delete":
+        transaction_id = int(command["id"])
+        if not tracker.delete_transaction(transaction_id):
+            raise LookupError(f"Transaction with ID {transaction_id} not found.")
+        return {"id": transaction_id}
+    if op == "filter":
+        rows = tracker.iter_transactions(command.get("category"), optional_date("start_date"), optional_date("end_date"),
+                                         limit=command.get("limit"))
+        return {"transactions": [dict(zip(TRANSACTION_COLUMNS, row)) for row in rows]}
+    if op == "search":
+        rows = tracker.search_transactions(command["query"], command.get("category"), optional_date("start_date"),
+                                           optional_date("end_date"), limit=command.get("limit", SEARCH_LIMIT))
+        return {"transactions": [dict(zip(TRANSACTION_COLUMNS, row)) for row in rows]}
+    if op == "balance":
+        return {"balance": tracker.get_balance()}
+    raise ValueError(f"unknown command {op!r}")
+
+def run_batch_line(tracker, number, line):
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    result = {"line": number}
+    try:
+        command = parse_batch_command(line)
+        result["op"] = command["op"]
+        with tracker.savepoint():
+            result.update(execute_batch_command(tracker, command))
+        result["ok"] = True
+    except Exception as error:
+        result["ok"] = False
+        result["error"] = str(error) or type(error).__name__
+    return result
+
+def run_batch(tracker, lines, batch_size=BATCH_SIZE, atomic=False, out=sys.stdout):
+    """Run batch commands, committing every batch_size lines, and write one JSON result per command.
+
+    Each command runs in its own savepoint, so a failing command leaves the others of its batch
+    intact; results are written once their batch is committed. With atomic, everything runs in a
+    single transaction that is rolled back entirely at the first failure.
+    """
+    numbered = enumerate(lines, start=1)
+    pending, ok, failed = [], 0, 0
+    try:
+        with tracker.batch() if atomic else nullcontext():
+            for chunk in iter(lambda: list(islice(numbered, batch_size)), []):
+                with tracker.batch():
+                    for number, line in chunk:
+                        result = run_batch_line(tracker, number, line)
+                        if result is None:
+                            continue
+                        pending.append(result)
+                        if result["ok"]:
+                            ok += 1
+                            continue
+                        failed += 1
+                        if atomic:
+                            raise BatchAborted
+                if not atomic:
+                    write_batch_results(pending, out)
+    except BatchAborted:
+        for result in pending:
+            result["rolled_back"] = True
+    write_batch_results(pending, out)
+    committed = not (atomic and failed)
+    summary = {"commands": ok + failed, "ok": ok, "failed": failed, "committed": committed}
+    out.write(json.dumps({"summary": summary}) + "\n")
+    return failed == 0
+
+def write_batch_results(results, out):
+    for result in results:
+        out.write(json.dumps(result) + "\n")
+    results.clear()
+
+def handle_batch(tracker, args):
+    if args.batch == "-":
+        return run_batch(tracker, sys.stdin, args.batch_size, args.atomic)
+    with open(args.batch, encoding="utf-8") as f:
+        return run_batch(tracker, f, args.batch_size, args.atomic)
 
 def interactive_mode(tracker, first_time):
     while True:
@@ -100,7 +322,7 @@ def interactive_mode(tracker, first_time):
                 tracker.print_transactions()
             elif choice == "4":
                 transaction_id = int(input("Enter the transaction ID to delete: "))
-                tracker.delete_transaction(transaction_id)
+                handle_delete(tracker, transaction_id)
             elif choice == "5":
                 handle_interactive_modify(tracker)
             elif choice == "6":
@@ -119,10 +341,11 @@ def handle_interactive_add(tracker):
         "Enter the date (YYYY-MM-DD) or 'today'/'yesterday': ",
         example="2025-01-01")
     date = resolve_date(date_input)
-    categories = tracker.get_categories()
+    usage = tracker.get_category_usage()
+    categories = [cat for cat, _ in usage]
     print("Select a category from the list or enter a new one:")
-    for i, cat in enumerate(categories):
-        print(f"{i}. {cat}")
+    for i, (cat, count) in enumerate(usage):
+        print(f"{i}. {cat} ({count})")
     category_input = formatted_input("Enter the category number or a new category: ")
     category = categories[int(category_input)] if category_input.isdigit() and int(category_input) < len(categories) else category_input
     description = formatted_input(
@@ -131,7 +354,11 @@ def handle_interactive_add(tracker):
     amount = float(formatted_input(
         "Enter the amount (use negative for expenses, postive for income): ",
         example="-25.50"))
-    tracker.add_transaction(date, category, description, amount)
+    try:
+        tracker.add_transaction(date, category, description, amount)
+    except ValueError as error:
+        print(error)
+        return
     print("Transaction added successfully!")
 
 def handle_interactive_view(tracker):
@@ -153,7 +380,10 @@ def handle_interactive_modify(tracker):
     description = formatted_input("Enter the new description (leave blank to keep unchanged): ") or None
     amount = formatted_input("Enter the new amount (leave blank to keep unchanged): ")
     amount = float(amount) if amount else None
-    tracker.modify_transaction(transaction_id, date, category, description, amount)
+    try:
+        report_modify(tracker.modify_transaction(transaction_id, date, category, description, amount), transaction_id)
+    except ValueError as error:
+        print(error)
 
 def handle_interactive_filter(tracker):
     category = formatted_input("Enter category to filter (leave blank for all): ") or None
@@ -161,26 +391,74 @@ def handle_interactive_filter(tracker):
     end_date = formatted_input("Enter end date (YYYY-MM-DD, leave blank for no end date): ") or None
     tracker.filter_transactions(category, start_date, end_date)
 
+def setup_profiler(args):
+    profiler = Profiler() if args.profile or args.profile_json else Profiler.from_env()
+    if profiler is None:
+        return None
+    json_path = args.profile_json or os.environ.get(PROFILE_JSON_ENV)
+    atexit.register(report_profile, profiler, json_path)
+    return profiler
+
+def report_profile(profiler, json_path):
+    profiler.report()
+    if json_path:
+        profiler.dump_json(json_path)
+        print(f"Profile written to {json_path}.", file=sys.stderr)
+
 def main():
     setup_readline()
     args = parse_arguments()
-    tracker = BudgetTracker()
+    profiler = setup_profiler(args)
+    # A batch read from stdin cannot also answer the initial-amount prompt of a new database.
+    initial_amount = 0.0 if args.batch == "-" else None
+    tracker = BudgetTracker(args.db, initial_amount=initial_amount, profiler=profiler)
     first_time = True
 
     if args.add:
         handle_add(tracker, args)
     elif args.view:
-        tracker.view_summary()
+        handle_view(tracker, args)
+    elif args.forecast:
+        tracker.print_forecast(args.forecast)
     elif args.balance:
         tracker.calculate_balance()
+    elif args.balance_at:
+        date = resolve_date(args.balance_at)
+        print(f"\nBalance at {date}: {tracker.balance_at(date):.2f}")
     elif args.print:
-        tracker.print_transactions()
+        tracker.print_transactions(limit=args.limit, after_id=args.after_id, output=args.output)
     elif args.delete:
-        tracker.delete_transaction(args.delete)
+        handle_delete(tracker, args.delete)
     elif args.modify:
         handle_modify(tracker, args)
     elif args.filter:
         handle_filter(tracker, args)
+    elif args.search:
+        handle_search(tracker, args)
+    elif args.batch:
+        sys.exit(0 if handle_batch(tracker, args) else 1)
+    elif args.import_file:
+        handle_import(tracker, args)
+    elif args.add_rule:
+        handle_add_rule(tracker, args)
+    elif args.rules:
+        tracker.print_recurring_rules()
+    elif args.delete_rule:
+        handle_delete_rule(tracker, args.delete_rule)
+    elif args.materialize:
+        tracker.materialize_recurring(resolve_date(args.materialize))
+    elif args.rename_category:
+        handle_rename_category(tracker, args)
+    elif args.export_snapshot:
+        tracker.export_snapshot(args.export_snapshot, args.snapshot_format, args.full)
+    elif args.check_indexes:
+        sys.exit(0 if tracker.check_query_plans() else 1)
+    elif args.rebuild_aggregates:
+        tracker.rebuild_aggregates()
+    elif args.serve:
+        from tracker_server import serve
+        tracker.conn.close()
+        serve(args.db, args.host, args.port, args.socket, args.readers)
     else:
         interactive_mode(tracker, first_time)
 
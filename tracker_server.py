@@ -0,0 +1,258 @@
+"""Local JSON service for concurrent access to one budget database.
+
+Several household scripts and the interactive CLI can share ``budget_data.db`` through this
+server instead of opening it directly:
+
+- the database runs in WAL mode, so reads never wait for a write to finish;
+- reads are served in parallel from a pool of reader connections;
+- writes go through a queue drained by a single writer thread, which commits everything
+  pending in one transaction (each request inside its own savepoint).
+
+Endpoints (all bodies and responses are JSON):
+
+    GET    /balance?date=
+    GET    /categories
+    GET    /summary?start_date=&end_date=
+    GET    /transactions?category=&start_date=&end_date=&after_id=&limit=
+    GET    /search?q=&category=&start_date=&end_date=&limit=
+    POST   /transactions          {"date", "category", "description", "amount"}
+    PATCH  /transactions/<id>     any of {"date", "category", "description", "amount"}
+    DELETE /transactions/<id>
+"""
+import json
+import os
+import queue
+import socketserver
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from BudgetTracker import SEARCH_LIMIT, TRANSACTION_COLUMNS, BudgetTracker
+
+DEFAULT_READERS = 4
+DEFAULT_WRITE_BATCH = 256
+MAX_PAGE = 10000
+
+
+class TrackerService:
+    """Reader connection pool plus a single batching writer over one database file."""
+
+    def __init__(self,
+                 db_file: str = "budget_data.db",
+                 readers: int = DEFAULT_READERS,
+                 write_batch: int = DEFAULT_WRITE_BATCH,
+                 busy_timeout: float = 30.0):
+        self.db_file = db_file
+        self.write_batch = write_batch
+        self.writer = BudgetTracker(db_file, wal=True, busy_timeout=busy_timeout, check_same_thread=False)
+        self.readers: "queue.Queue[BudgetTracker]" = queue.Queue()
+        for _ in range(readers):
+            self.readers.put(BudgetTracker(db_file, wal=True, busy_timeout=busy_timeout, check_same_thread=False))
+        self.writes: "queue.Queue[Optional[Tuple[Callable[[BudgetTracker], Any], Future]]]" = queue.Queue()
+        self.writer_thread = threading.Thread(target=self._write_loop, name="tracker-writer", daemon=True)
+        self.writer_thread.start()
+
+    @contextmanager
+    def reader(self) -> Iterator[BudgetTracker]:
+        """Borrow a reader connection from the pool."""
+        tracker = self.readers.get()
+        try:
+            yield tracker
+        finally:
+            self.readers.put(tracker)
+
+    def read(self, operation: Callable[[BudgetTracker], Any]) -> Any:
+        with self.reader() as tracker:
+            return operation(tracker)
+
+    def write(self, operation: Callable[[BudgetTracker], Any]) -> Any:
+        """Queue a write for the writer thread and wait for its result."""
+        future: Future = Future()
+        self.writes.put((operation, future))
+        return future.result()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self.writes.get()
+            if item is None:
+                return
+            pending = [item]
+            while len(pending) < self.write_batch:
+                try:
+                    item = self.writes.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.writes.put(None)
+                    break
+                pending.append(item)
+            self._apply(pending)
+
+    def _apply(self, pending: list) -> None:
+        results = []
+        try:
+            with self.writer.batch():
+                for operation, future in pending:
+                    try:
+                        with self.writer.savepoint():
+                            results.append((future, operation(self.writer), None))
+                    except Exception as error:
+                        results.append((future, None, error))
+        except Exception as error:
+            # The commit itself failed, so none of the batch was written.
+            results = [(future, None, error) for _, future in pending]
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def close(self) -> None:
+        self.writes.put(None)
+        self.writer_thread.join()
+        while not self.readers.empty():
+            self.readers.get().conn.close()
+        self.writer.conn.close()
+
+
+def transaction_dict(row: Tuple) -> Dict[str, Any]:
+    return dict(zip(TRANSACTION_COLUMNS, row))
+
+
+class TrackerRequestHandler(BaseHTTPRequestHandler):
+    """Map the JSON endpoints onto TrackerService reads and writes."""
+
+    service: TrackerService
+
+    def do_GET(self) -> None:
+        self.handle_json(self.get)
+
+    def do_POST(self) -> None:
+        self.handle_json(self.post)
+
+    def do_PATCH(self) -> None:
+        self.handle_json(self.patch)
+
+    def do_DELETE(self) -> None:
+        self.handle_json(self.delete)
+
+    def handle_json(self, method: Callable[[], None]) -> None:
+        try:
+            method()
+        except (KeyError, ValueError, TypeError) as error:
+            self.respond(400, {"error": f"Bad request: {error}"})
+        except Exception as error:
+            self.respond(500, {"error": str(error)})
+
+    def get(self) -> None:
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/balance":
+            if "date" in query:
+                self.respond(200, {"balance": self.service.read(lambda t: t.balance_at(query["date"])), "date": query["date"]})
+            else:
+                self.respond(200, {"balance": self.service.read(lambda t: t.get_balance())})
+        elif url.path == "/categories":
+            self.respond(200, {"categories": self.service.read(lambda t: t.get_categories())})
+        elif url.path == "/summary":
+            totals = self.service.read(lambda t: t.get_category_totals(query.get("start_date"), query.get("end_date")))
+            self.respond(200, {"summary": [{"category": c, "total": total} for c, total in totals]})
+        elif url.path == "/transactions":
+            limit = min(int(query.get("limit", MAX_PAGE)), MAX_PAGE)
+            after_id = int(query["after_id"]) if "after_id" in query else None
+            rows = self.service.read(lambda t: list(t.iter_transactions(
+                query.get("category"), query.get("start_date"), query.get("end_date"),
+                after_id=after_id, limit=limit)))
+            self.respond(200, {"transactions": [transaction_dict(row) for row in rows]})
+        elif url.path == "/search":
+            limit = min(int(query.get("limit", SEARCH_LIMIT)), MAX_PAGE)
+            rows = self.service.read(lambda t: t.search_transactions(
+                query["q"], query.get("category"), query.get("start_date"), query.get("end_date"), limit=limit))
+            self.respond(200, {"transactions": [transaction_dict(row) for row in rows]})
+        else:
+            self.respond(404, {"error": f"Unknown endpoint {url.path}"})
+
+    def post(self) -> None:
+        if urlparse(self.path).path != "/transactions":
+            self.respond(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+        body = self.read_body()
+        fields = (body["date"], body["category"], body.get("description", ""), float(body["amount"]))
+        transaction_id = self.service.write(lambda t: t.add_transaction(*fields))
+        self.respond(201, {"id": transaction_id})
+
+    def patch(self) -> None:
+        transaction_id = self.transaction_id()
+        if transaction_id is None:
+            return
+        body = self.read_body()
+        amount = float(body["amount"]) if body.get("amount") is not None else None
+        updated = self.service.write(lambda t: t.modify_transaction(
+            transaction_id, body.get("date"), body.get("category"), body.get("description"), amount))
+        self.respond(200 if updated else 404, {"id": transaction_id, "updated": updated})
+
+    def delete(self) -> None:
+        transaction_id = self.transaction_id()
+        if transaction_id is None:
+            return
+        deleted = self.service.write(lambda t: t.delete_transaction(transaction_id))
+        self.respond(200 if deleted else 404, {"id": transaction_id, "deleted": deleted})
+
+    def transaction_id(self) -> Optional[int]:
+        parts = urlparse(self.path).path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "transactions" or not parts[1].isdigit():
+            self.respond(404, {"error": f"Unknown endpoint {self.path}"})
+            return None
+        return int(parts[1])
+
+    def read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("expected a JSON object")
+        return body
+
+    def respond(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        return self.client_address[0] if self.client_address else "unix-socket"
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(db_file: str = "budget_data.db",
+          host: str = "127.0.0.1",
+          port: int = 8765,
+          socket_path: Optional[str] = None,
+          readers: int = DEFAULT_READERS) -> None:
+    """Serve the tracker over HTTP on host:port, or on a Unix socket when ``socket_path`` is given."""
+    service = TrackerService(db_file, readers=readers)
+    handler = type("Handler", (TrackerRequestHandler,), {"service": service})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, handler)
+        print(f"Serving {db_file} on unix socket {socket_path}")
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        print(f"Serving {db_file} on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)